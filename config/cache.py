@@ -0,0 +1,146 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date, urlencode
+from rest_framework.response import Response
+
+from config import settings
+from monitoring.metrics import registry
+
+# Версия пространства имён ключей. Увеличение версии делает недействительными
+# все ключи пространства имён без их поиска и удаления
+CACHE_VERSION_KEY = 'cache_version:{}'
+# Блокировка на время вычисления значения (защита от одновременного
+# пересчёта одного и того же значения всеми процессами)
+CACHE_LOCK_KEY = 'cache_lock:{}'
+
+_MISSING = object()
+
+registry.describe('lms_cache_requests_total', 'counter', 'Количество обращений к кэшу (result: hit, miss, wait)')
+
+
+def get_version(namespace: str) -> int:
+    """Функция возвращает версию пространства имён ключей. При отсутствии
+    версии в кэше создаётся новая, уникальная по времени, чтобы не совпасть
+    с версиями ранее закэшированных значений"""
+    key = CACHE_VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    """Функция увеличивает версию пространства имён, делая недействительными
+    все его закэшированные значения"""
+    key = CACHE_VERSION_KEY.format(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    """Ключ кэша с текущей версией пространства имён"""
+    return ':'.join(str(part) for part in (namespace, get_version(namespace), *parts))
+
+
+def cached(key: str, compute, timeout: int = None, name: str = 'default'):
+    """Функция возвращает значение из кэша, при его отсутствии - вычисляет
+    функцией compute и сохраняет в кэш. Значение вычисляет только один
+    процесс, получивший блокировку, остальные ждут его результата
+    не дольше CACHE_LOCK_WAIT секунд. Если значение не появилось (время
+    ожидания истекло или блокировка снята без сохранения значения - ошибка
+    или значение None), процесс вычисляет его сам.
+    Значение None не кэшируется. Обращения учитываются в метриках по имени name"""
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        registry.inc('lms_cache_requests_total', {'cache': name, 'result': 'hit'})
+        return value
+    registry.inc('lms_cache_requests_total', {'cache': name, 'result': 'miss'})
+
+    lock_key = CACHE_LOCK_KEY.format(key)
+    if cache.add(lock_key, True, timeout=settings.CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            if value is not None:
+                cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    registry.inc('lms_cache_requests_total', {'cache': name, 'result': 'wait'})
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if cache.get(lock_key) is None:
+            break
+    return compute()
+
+
+def conditional_response(request, build, etag: str, last_modified=None):
+    """Функция обрабатывает условные запросы (If-None-Match, If-Modified-Since).
+    Если копия клиента актуальна, возвращается ответ 304 без вызова build,
+    иначе - ответ build. Ответ получает заголовки ETag (хэш строки etag)
+    и Last-Modified (если передано время last_modified), клиент должен
+    проверять актуальность копии при каждом обращении"""
+    etag = quote_etag(hashlib.md5(etag.encode()).hexdigest())
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class CachedResponseMixin:
+    """Примесь к представлениям DRF, кэширующая ответы list и retrieve.
+    Ответы хранятся отдельно для каждой области видимости (get_cache_scope):
+    закэшированный ответ получает только пользователь, которому он уже
+    был отдан после проверки прав, или пользователь с теми же правами.
+    Все ответы представления сбрасываются увеличением версии cache_namespace"""
+    cache_namespace = None
+    cache_timeout = None
+
+    def get_cache_scope(self, request) -> str:
+        return f'user:{request.user.pk}'
+
+    def get_cache_key(self, request, **kwargs) -> str:
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.md5(f'{request.path}?{params}'.encode()).hexdigest()
+        return versioned_key(self.cache_namespace, self.get_cache_scope(request), digest)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Ответ берётся из кэша, при отсутствии - формируется методом
+        handler. Кэшируются только успешные ответы"""
+        responses = []
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            responses.append(response)
+            return response.data if response.status_code == 200 else None
+
+        data = cached(
+            self.get_cache_key(request, **kwargs), compute,
+            timeout=self.cache_timeout or settings.VIEW_CACHE_TIMEOUT, name=self.cache_namespace
+        )
+        if responses:
+            return responses[0]
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,100 @@
+from rest_framework.serializers import ListSerializer
+
+# Параметры запроса: список полей ответа и список раскрываемых связанных объектов
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _param_set(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return frozenset(item.strip() for item in value.split(',') if item.strip())
+
+
+def get_fieldset(request) -> tuple:
+    """Функция возвращает набор запрошенных полей (None - все поля)
+    и набор раскрываемых полей из параметров GET запроса"""
+    if request is None or request.method != 'GET':
+        return None, frozenset()
+    return _param_set(request, FIELDS_PARAM), _param_set(request, EXPAND_PARAM) or frozenset()
+
+
+def is_sparse(request) -> bool:
+    """Функция проверяет, ограничен ли состав ответа параметрами запроса"""
+    requested, expanded = get_fieldset(request)
+    return requested is not None or bool(expanded)
+
+
+class SparseFieldsetSerializerMixin:
+    """Примесь к сериализаторам: ?fields=a,b оставляет в ответе только
+    перечисленные поля, ?expand=x заменяет id связанного объекта вложенным
+    представлением (сериализатор из expandable_fields). Параметры запроса
+    применяются только к объектам верхнего уровня ответа"""
+    expandable_fields = {}
+
+    def is_top_level(self) -> bool:
+        return self.parent is None or (isinstance(self.parent, ListSerializer) and self.parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_top_level():
+            return fields
+        requested, expanded = get_fieldset(self.context.get('request'))
+        for name in expanded & self.expandable_fields.keys():
+            fields[name] = self.expandable_fields[name](read_only=True)
+        if requested is not None:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        return fields
+
+
+class SparseFieldsetViewMixin:
+    """Примесь к представлениям DRF, загружающая из БД только данные
+    запрошенных полей (?fields=, ?expand=):
+    - поля модели, не вошедшие в ответ, не загружаются (defer), кроме
+      необходимых самому представлению (fieldset_required_fields);
+    - вложенные объекты из fieldset_prefetch загружаются, только если
+      соответствующее поле запрошено;
+    - раскрываемые связанные объекты загружаются тем же запросом (select_related).
+    Исходный queryset представления задаётся методом get_base_queryset"""
+    fieldset_required_fields = ()
+    fieldset_prefetch = {}
+
+    def is_field_requested(self, name: str) -> bool:
+        requested, _ = get_fieldset(self.request)
+        return requested is None or name in requested
+
+    def get_base_queryset(self):
+        """Queryset до отбора полей, по умолчанию - queryset представления"""
+        return super().get_queryset()
+
+    def get_queryset(self):
+        queryset = self.get_base_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        serializer_class = self.get_serializer_class()
+        serializer_fields = serializer_class().fields
+        requested, expanded = get_fieldset(self.request)
+
+        if requested is not None:
+            model_fields = {
+                field.attname for field in queryset.model._meta.concrete_fields
+                if not field.is_relation and not field.primary_key
+            }
+            deferred = [
+                field.source for name, field in serializer_fields.items()
+                if name not in requested and field.source in model_fields
+                and field.source not in self.fieldset_required_fields
+            ]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+
+        for name, lookup in self.fieldset_prefetch.items():
+            if name in serializer_fields and self.is_field_requested(name):
+                queryset = queryset.prefetch_related(lookup)
+
+        expandable = getattr(serializer_class, 'expandable_fields', {})
+        related = [name for name in expanded & expandable.keys() if self.is_field_requested(name)]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
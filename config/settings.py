@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -25,6 +26,9 @@ SECRET_KEY = 'django-insecure-bod7y-m%z&*0+f#sry68f-*kyu5wzyw_g+v4wo-ahe0q5n!)o)
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Запуск тестов (manage.py test)
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = []
 
 # Application definition
@@ -41,6 +45,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'users',
     'courses',
+    'monitoring',
 
     'django_filters',
     'drf_yasg',
@@ -49,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -109,22 +115,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Stateless аутентификация: пользователь, его активность и роли берутся
+# из токена доступа без обращения к БД. Блокировки и смена ролей действуют
+# через список отзыва токенов в кэше (users.services.revoke_user_tokens)
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', 'True') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'users.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication'
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ]
 }
 
+# Максимальное количество объектов на странице, которое может запросить клиент
+MAX_PAGE_SIZE = 100
+
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    # При stateless аутентификации данные токена доступа (роли, активность)
+    # не перепроверяются по БД, поэтому токен живёт недолго: отметки об отзыве
+    # хранятся в кэше столько же и их потеря не продлевает доступ надолго
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15) if JWT_STATELESS_AUTH else timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=10),
-
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.UserTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.UserTokenRefreshSerializer',
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsUser',
 }
 
 # Internationalization
@@ -160,9 +180,82 @@ AUTH_USER_MODEL = 'users.User'
 # Ключ для работы с API сервиса STRIPE.COM
 STRIPE_API_KEY = 'sk_test_4eC39HqLyjWDarjtT1zdp7dc'
 
+# Клиент платёжного сервиса. Для работы без доступа к STRIPE.COM
+# используется 'courses.payment_clients.FakeStripeClient'
+PAYMENT_CLIENT = 'courses.payment_clients.StripeClient'
+
+# Базовая задержка (в секундах) перед повторной попыткой провести платёж
+PAYMENT_RETRY_BACKOFF = 10
+
 # URL-адрес брокера сообщений
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 
+# Кэш хранится в Redis (отдельная от брокера БД) и общий для всех процессов
+# веб-сервера и воркеров Celery. Соединения берутся из пула клиента Redis.
+# При запуске тестов используется кэш в памяти процесса
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://redis:6379/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'lms',
+        'OPTIONS': {
+            'max_connections': int(os.getenv('CACHE_REDIS_MAX_CONNECTIONS', 50)),
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+            'retry_on_timeout': True,
+        },
+    },
+}
+if TESTING or os.getenv('CACHE_BACKEND') == 'locmem':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Сессии хранятся в кэше с записью в БД
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Время хранения в кэше ответов представлений (CachedResponseMixin), в секундах
+VIEW_CACHE_TIMEOUT = 300
+# Время жизни блокировки пересчёта значения кэша, максимальное время
+# ожидания результата другим процессом и интервал проверки, в секундах
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 5
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+# Количество строк, читаемых из БД за один раз при выгрузке платежей
+EXPORT_CHUNK_SIZE = 2000
+
+# Количество строк, сохраняемых одним запросом при массовой загрузке
+IMPORT_CHUNK_SIZE = 1000
+
+# Время хранения в кэше отчётов по платежам за закрытые периоды, в секундах
+PAYMENTS_ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время хранения в кэше ролей (групп) пользователя, в секундах
+USER_ROLES_CACHE_TIMEOUT = 300
+
+# Время хранения в кэше детальной информации о курсе, в секундах
+COURSE_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Время хранения в кэше набора подписок пользователя на курсы, в секундах
+USER_SUBSCRIPTIONS_CACHE_TIMEOUT = 60 * 60
+
+# Период неактивности, после которого пользователь блокируется,
+# и размер пачки пользователей, блокируемых одним запросом
+USER_INACTIVITY_PERIOD = timedelta(days=30)
+USER_DEACTIVATION_CHUNK_SIZE = 1000
+
+# Количество адресов подписчиков, обрабатываемых одной задачей рассылки
+COURSE_NOTIFICATION_CHUNK_SIZE = 500
+
+# Окно (в секундах), в течение которого все обновления курса объединяются
+# в одну рассылку уведомлений подписчикам
+COURSE_NOTIFICATION_WINDOW = 60 * 60 * 4
+
+# Отложенные задачи, не подтверждённые за visibility_timeout секунд,
+# брокер Redis доставляет повторно. Время ожидания должно превышать
+# задержку рассылки уведомлений
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': COURSE_NOTIFICATION_WINDOW + 60 * 60}
+
 
 # Настройки для подключения сервиса отправки электронной почты
 EMAIL_HOST = 'smtp.yandex.ru'
@@ -170,3 +263,40 @@ EMAIL_PORT = 465
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_USE_SSL = True
+
+
+# Инструментирование запросов (приложение monitoring)
+# Доля запросов (от 0 до 1), для которых собираются метрики
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', 1))
+# Длительность обработки запроса (в секундах), после которой запрос
+# считается медленным и записывается в лог с уровнем WARNING
+REQUEST_SLOW_THRESHOLD = float(os.getenv('REQUEST_SLOW_THRESHOLD', 0.5))
+# Добавлять ли в ответы заголовок Server-Timing
+REQUEST_METRICS_SERVER_TIMING = True
+# Пути, для которых метрики не собираются
+REQUEST_METRICS_EXCLUDE_PATHS = ('/metrics/',)
+# Токен доступа к эндпоинту метрик (заголовок Authorization: Bearer <token>)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'monitoring': {
+            'handlers': ['console'],
+            # При запуске тестов в лог попадают только медленные запросы
+            'level': os.getenv('MONITORING_LOG_LEVEL', 'WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Очереди брокера, длина которых выводится в метриках задач Celery,
+# и количество сообщений каждой очереди, просматриваемых для подсчёта задач по именам
+TASK_METRICS_QUEUES = ('celery',)
+TASK_METRICS_QUEUE_INSPECT_LIMIT = 1000
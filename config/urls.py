@@ -43,5 +43,6 @@ urlpatterns = [
       path('token/refresh/', TokenRefreshView.as_view()),
       path('', include('courses.urls', namespace='courses')),
       path('users/', include('users.urls', namespace='users')),
+      path('', include('monitoring.urls', namespace='monitoring')),
       path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
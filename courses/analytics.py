@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from config import settings
+from config.cache import bump_version, cached, versioned_key
+from courses.models import CourseStats, Payments
+
+# Пространство имён закэшированных отчётов по платежам
+PAYMENTS_ANALYTICS_NAMESPACE = 'payments_analytics'
+
+# Поля и выражения группировки для каждого из доступных разрезов отчёта
+GROUPINGS = {
+    'day': ((), {'period': TruncDay('payment_date')}),
+    'week': ((), {'period': TruncWeek('payment_date')}),
+    'month': ((), {'period': TruncMonth('payment_date')}),
+    'course': (('course',), {'title': F('course__title')}),
+    'lesson': (('lesson',), {'title': F('lesson__title')}),
+    'payment_way': (('payment_way',), {}),
+}
+
+AGGREGATES = {
+    'revenue': Sum('amount'),
+    'count': Count('pk'),
+    'average': Avg('amount'),
+}
+
+
+def payments_analytics(group_by: str, date_from: date = None, date_to: date = None) -> dict:
+    """Функция возвращает выручку, количество и средний размер проведённых
+    платежей в заданном разрезе за период. Отчёты за закрытые периоды
+    (заканчивающиеся до текущей даты) кэшируются"""
+    if date_to and date_to < date.today():
+        return cached(
+            versioned_key(PAYMENTS_ANALYTICS_NAMESPACE, group_by, date_from, date_to),
+            lambda: _build_report(group_by, date_from, date_to),
+            settings.PAYMENTS_ANALYTICS_CACHE_TIMEOUT, name='payments_analytics'
+        )
+    return _build_report(group_by, date_from, date_to)
+
+
+def bump_payments_analytics_version() -> None:
+    """Функция делает недействительными закэшированные отчёты. Вызывается
+    при загрузке платежей задним числом"""
+    bump_version(PAYMENTS_ANALYTICS_NAMESPACE)
+
+
+def _build_report(group_by, date_from, date_to) -> dict:
+    if group_by == 'course' and not date_from and not date_to:
+        return _course_report_from_stats()
+
+    payments = Payments.objects.filter(status=Payments.STATUS_SUCCEEDED)
+    if date_from:
+        payments = payments.filter(payment_date__gte=date_from)
+    if date_to:
+        payments = payments.filter(payment_date__lte=date_to)
+    if group_by in ('course', 'lesson'):
+        payments = payments.filter(**{f'{group_by}__isnull': False})
+
+    fields, expressions = GROUPINGS[group_by]
+    results = payments.values(*fields, **expressions).annotate(**AGGREGATES).order_by(
+        *fields, *expressions
+    )
+    return {
+        'results': [_round_average(row) for row in results],
+        'total': _round_average(payments.aggregate(**AGGREGATES)),
+    }
+
+
+def _course_report_from_stats() -> dict:
+    """Отчёт по курсам за всё время строится по готовой статистике курсов"""
+    stats = CourseStats.objects.filter(payment_count__gt=0).values(
+        'course', 'revenue_total', 'payment_count', title=F('course__title')
+    ).order_by('course')
+    results = [
+        {
+            'course': row['course'],
+            'title': row['title'],
+            'revenue': row['revenue_total'],
+            'count': row['payment_count'],
+            'average': row['revenue_total'] / row['payment_count'],
+        }
+        for row in stats
+    ]
+    revenue = sum(row['revenue'] for row in results)
+    count = sum(row['count'] for row in results)
+    total = {'revenue': revenue or None, 'count': count, 'average': revenue / count if count else None}
+    return {
+        'results': [_round_average(row) for row in results],
+        'total': _round_average(total),
+    }
+
+
+def _round_average(row: dict) -> dict:
+    if row['average'] is not None:
+        row['average'] = round(float(row['average']), 2)
+    return row
@@ -0,0 +1,225 @@
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.analytics import bump_payments_analytics_version
+from courses.cache import invalidate_lessons_cache
+from courses.models import Course, Lesson, Payments, Subscription
+from courses.search import invalidate_search_index
+from courses.stats import rebuild_course_stats
+from users.models import User
+from users.services import MODERATOR_ROLE
+
+# Объёмы данных по умолчанию для generate_data
+DEFAULT_VOLUMES = {
+    'users': 1000,
+    'courses': 200,
+    'lessons_per_course': 20,
+    'subscriptions_per_user': 5,
+    'payments': 20000,
+}
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+WORDS = (
+    'python', 'django', 'основы', 'программирование', 'веб', 'базы', 'данных', 'алгоритмы',
+    'тестирование', 'асинхронность', 'api', 'анализ', 'структуры', 'практика', 'проект', 'введение',
+)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_data(volumes: dict = None, seed: int = 0, batch_size: int = 1000) -> dict:
+    """Функция создаёт набор данных для нагрузочного тестирования:
+    пользователей (часть из них - Модераторы), курсы, уроки, подписки
+    и платежи. Объекты создаются через bulk_create, после чего явно
+    пересчитывается статистика курсов. Объекты получают уникальный префикс,
+    поэтому команду можно запускать повторно. Возвращает количество созданных
+    объектов каждого типа"""
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed)
+    prefix = f'bench{time.time_ns()}'
+    password = make_password(BENCHMARK_PASSWORD)
+    now = timezone.now()
+    today = now.date()
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(email=f'{prefix}.{i}@example.com', password=password, city='Москва',
+                 last_login=now - timedelta(days=rng.randrange(90)))
+            for i in range(volumes['users'])
+        ], batch_size=batch_size)
+        moderators, _ = Group.objects.get_or_create(name=MODERATOR_ROLE)
+        moderators.user_set.add(*users[:max(len(users) // 100, 1)])
+
+        courses = Course.objects.bulk_create([
+            Course(title=f'{rng.choice(WORDS)} {i}'[:25], description=_text(rng, 30), author=rng.choice(users))
+            for i in range(volumes['courses'])
+        ], batch_size=batch_size)
+
+        lessons = Lesson.objects.bulk_create([
+            Lesson(title=f'{rng.choice(WORDS)} {i}'[:25], description=_text(rng, 50),
+                   link='https://youtube.com/watch', course=course, author_id=course.author_id)
+            for course in courses for i in range(volumes['lessons_per_course'])
+        ], batch_size=batch_size)
+
+        Subscription.objects.bulk_create([
+            Subscription(user=user, course=course)
+            for user in users
+            for course in rng.sample(courses, min(volumes['subscriptions_per_user'], len(courses)))
+        ], batch_size=batch_size, ignore_conflicts=True)
+
+        payments = []
+        for _ in range(volumes['payments']):
+            by_course = rng.random() < 0.7
+            payments.append(Payments(
+                paid_by=rng.choice(users),
+                payment_date=today - timedelta(days=rng.randrange(365)),
+                course=rng.choice(courses) if by_course else None,
+                lesson=None if by_course else rng.choice(lessons),
+                amount=rng.choice((500, 1000, 2000, 5000)),
+                payment_way=rng.choice(('cash', 'transaction')),
+                status=rng.choices((Payments.STATUS_SUCCEEDED, Payments.STATUS_FAILED), (9, 1))[0],
+            ))
+        Payments.objects.bulk_create(payments, batch_size=batch_size)
+
+        # bulk_create не отправляет сигналы, обновляем производные данные явно
+        rebuild_course_stats([course.pk for course in courses])
+    bump_payments_analytics_version()
+    invalidate_search_index(Course)
+    invalidate_search_index(Lesson)
+    invalidate_lessons_cache()
+
+    return {
+        'users': len(users),
+        'courses': len(courses),
+        'lessons': len(lessons),
+        'subscriptions': Subscription.objects.filter(user__in=users).count(),
+        'payments': len(payments),
+    }
+
+
+def percentile(values, percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def scenarios(user, moderator) -> dict:
+    """Сценарии нагрузочного тестирования: имя сценария -> (пользователь, URL).
+    Сценарии выполняют только чтение и не изменяют данные"""
+    course = Course.objects.filter(author=user).only('pk').first() or Course.objects.only('pk').first()
+    lesson = Lesson.objects.filter(author=user).only('pk').first() or Lesson.objects.only('pk').first()
+    deep_page = max(Payments.objects.count() // 5 // 2, 1)
+    return {
+        'courses_list': (user, reverse('courses:courses-list')),
+        'courses_list_moderator': (moderator, reverse('courses:courses-list')),
+        'courses_list_subscribed': (user, reverse('courses:courses-list') + '?subscribed=true'),
+        'courses_detail': (moderator, reverse('courses:courses-detail', args=[course.pk])),
+        'courses_search': (moderator, reverse('courses:search') + '?q=python'),
+        'lessons_list': (user, reverse('courses:lessons_list')),
+        'lessons_list_moderator': (moderator, reverse('courses:lessons_list')),
+        'lessons_detail': (moderator, reverse('courses:lessons_detail', args=[lesson.pk])),
+        'payments_list': (user, reverse('courses:payments-list')),
+        'payments_list_deep_page': (user, reverse('courses:payments-list') + f'?page={deep_page}'),
+        'payments_list_cursor': (user, reverse('courses:payments-list') + '?pagination=cursor'),
+        'payments_by_course': (user, reverse('courses:payments-list') + f'?course={course.pk}'),
+        'payments_analytics': (moderator, reverse('courses:payments_analytics') + '?group_by=month'),
+        'users_detail': (user, reverse('users:user-detail', args=[user.pk])),
+        'users_payments': (user, reverse('users:user-payments', args=[user.pk])),
+    }
+
+
+def run_scenario(client, url: str, requests: int, warmup: int) -> dict:
+    """Функция выполняет GET запросы к URL и возвращает перцентили времени
+    ответа (мс), пропускную способность и количество запросов к БД"""
+    for _ in range(warmup):
+        client.get(url)
+
+    timings, query_counts, statuses = [], [], {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            request_started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - request_started) * 1000)
+        query_counts.append(len(queries))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'url': url,
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'throughput_rps': round(requests / elapsed, 1),
+        'queries_min': min(query_counts),
+        'queries_max': max(query_counts),
+        'statuses': {str(code): count for code, count in statuses.items()},
+    }
+
+
+def run_benchmarks(requests: int = 50, warmup: int = 5, only=None) -> dict:
+    """Функция выполняет сценарии нагрузочного тестирования внутри процесса
+    (без HTTP сервера) от имени обычного пользователя и Модератора"""
+    started = timezone.now()
+    moderator = User.objects.filter(groups__name=MODERATOR_ROLE).order_by('pk').first()
+    user = User.objects.filter(course__isnull=False).exclude(groups__name=MODERATOR_ROLE).order_by('pk').first()
+    if moderator is None or user is None:
+        raise ValueError('Нет данных для нагрузочного тестирования, выполните команду generate_data')
+
+    clients = {}
+    results = {}
+    # Запросы выполняются тестовым клиентом, его имя хоста должно быть разрешено
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, (client_user, url) in scenarios(user, moderator).items():
+            if only and name not in only:
+                continue
+            if client_user.pk not in clients:
+                clients[client_user.pk] = APIClient()
+                clients[client_user.pk].force_authenticate(user=client_user)
+            results[name] = run_scenario(clients[client_user.pk], url, requests, warmup)
+
+    return {
+        'started': started.isoformat(),
+        'database': connection.vendor,
+        'requests_per_scenario': requests,
+        'objects': {
+            'users': User.objects.count(),
+            'courses': Course.objects.count(),
+            'lessons': Lesson.objects.count(),
+            'subscriptions': Subscription.objects.count(),
+            'payments': Payments.objects.count(),
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    """Функция сравнивает результаты с базовым прогоном и возвращает
+    описания регрессий: рост p95 больше чем на threshold процентов или
+    рост количества запросов к БД"""
+    regressions = []
+    for name, result in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + threshold / 100):
+            regressions.append(f'{name}: p95 {base["p95_ms"]} -> {result["p95_ms"]} мс')
+        if result['queries_max'] > base['queries_max']:
+            regressions.append(f'{name}: запросов к БД {base["queries_max"]} -> {result["queries_max"]}')
+    return regressions
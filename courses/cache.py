@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from config import settings
+from config.cache import bump_version, cached, get_version
+from courses.models import Subscription
+
+COURSE_VERSION_NAMESPACE = 'course_version:{}'
+COURSE_DETAIL_CACHE_KEY = 'course_detail:{}:{}:{}'
+USER_SUBSCRIPTIONS_CACHE_KEY = 'user_subscriptions:{}'
+
+# Пространство имён закэшированных ответов со списками и деталями уроков
+LESSONS_CACHE_NAMESPACE = 'lessons'
+
+
+def get_course_version(course_pk: int) -> int:
+    """Функция возвращает версию содержимого курса (списка его уроков)"""
+    return get_version(COURSE_VERSION_NAMESPACE.format(course_pk))
+
+
+def bump_course_version(course_pk: int) -> None:
+    """Функция увеличивает версию содержимого курса, делая недействительными
+    все закэшированные ответы для этого курса"""
+    bump_version(COURSE_VERSION_NAMESPACE.format(course_pk))
+
+
+def invalidate_lessons_cache() -> None:
+    """Функция делает недействительными закэшированные ответы по урокам"""
+    bump_version(LESSONS_CACHE_NAMESPACE)
+
+
+def course_detail_key(course) -> str:
+    """Ключ кэша детальной информации о курсе зависит от времени
+    обновления курса и версии списка его уроков"""
+    return COURSE_DETAIL_CACHE_KEY.format(
+        course.pk, course.updated_at.timestamp(), get_course_version(course.pk)
+    )
+
+
+def get_course_detail(course, build):
+    """Функция возвращает информацию о курсе, не зависящую от пользователя.
+    При отсутствии в кэше она формируется функцией build"""
+    return cached(course_detail_key(course), build, settings.COURSE_DETAIL_CACHE_TIMEOUT, name='course_detail')
+
+
+def get_user_subscriptions(user_pk: int) -> frozenset:
+    """Функция возвращает набор id курсов, на которые подписан пользователь.
+    Набор хранится в кэше, при его отсутствии загружается из БД"""
+    return cached(
+        USER_SUBSCRIPTIONS_CACHE_KEY.format(user_pk),
+        lambda: frozenset(Subscription.objects.filter(user_id=user_pk).values_list('course_id', flat=True)),
+        settings.USER_SUBSCRIPTIONS_CACHE_TIMEOUT, name='user_subscriptions'
+    )
+
+
+def get_request_subscriptions(request) -> frozenset:
+    """Функция возвращает подписки текущего пользователя. Набор получается
+    один раз за запрос и сохраняется в объекте запроса"""
+    course_pks = getattr(request, '_user_subscriptions', None)
+    if course_pks is None:
+        user = request.user
+        course_pks = get_user_subscriptions(user.pk) if user and user.is_authenticated else frozenset()
+        request._user_subscriptions = course_pks
+    return course_pks
+
+
+def invalidate_user_subscriptions(user_pk: int) -> None:
+    """Функция удаляет закэшированный набор подписок пользователя после
+    фиксации транзакции. Набор загружается из БД при следующем обращении
+    (одним процессом, см. config.cache.cached), поэтому одновременные
+    изменения подписок не теряются"""
+    transaction.on_commit(lambda: cache.delete(USER_SUBSCRIPTIONS_CACHE_KEY.format(user_pk)))
@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.db.models import F
+from django_filters.filterset import filterset_factory
+
+from config import settings
+from courses.models import Payments
+
+# Поля, по которым фильтруются платежи в API и при выгрузке
+PAYMENTS_FILTER_FIELDS = ['lesson', 'course', 'payment_way']
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = ('id', 'paid_by', 'payment_date', 'course', 'lesson', 'amount', 'payment_way', 'status')
+
+
+class Echo:
+    """Объект с интерфейсом файла, возвращающий записанную строку,
+    чтобы csv.writer формировал строки без накопления в памяти"""
+
+    def write(self, value):
+        return value
+
+
+def filter_payments(params: dict):
+    """Функция возвращает queryset платежей, отфильтрованный так же,
+    как в PaymentsViewSet"""
+    filterset = filterset_factory(Payments, fields=PAYMENTS_FILTER_FIELDS)(
+        data=params, queryset=Payments.objects.all()
+    )
+    if not filterset.is_valid():
+        raise ValueError(dict(filterset.errors))
+    return filterset.qs
+
+
+def export_payments(queryset, file_format: str = 'csv'):
+    """Генератор строк выгрузки платежей в формате CSV или NDJSON.
+    Платежи читаются из БД серверным курсором пачками по EXPORT_CHUNK_SIZE
+    строк, поэтому расход памяти не зависит от размера выгрузки"""
+    rows = queryset.order_by('pk').values_list(
+        'id', F('paid_by__email'), 'payment_date', 'course', 'lesson', 'amount', 'payment_way', 'status'
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+    elif file_format == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str, ensure_ascii=False) + '\n'
+    else:
+        raise ValueError(f'Неизвестный формат выгрузки: {file_format}')
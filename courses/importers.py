@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from config import settings
+from courses.analytics import bump_payments_analytics_version
+from courses.cache import bump_course_version, invalidate_lessons_cache
+from courses.models import Course, Lesson
+from courses.search import invalidate_search_index
+from courses.serializers import CourseDefaultSerializer, LessonSerializer, PaymentsSerializer
+from courses.stats import rebuild_course_stats
+from users.models import User
+
+IMPORT_FORMATS = ('csv', 'ndjson', 'json')
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле связи, получающее объекты из словаря, заранее загруженного
+    одним запросом для всей пачки строк, вместо запроса на каждую строку"""
+
+    def to_internal_value(self, data):
+        try:
+            return self.context['related'][self.queryset.model][int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class CourseImportSerializer(CourseDefaultSerializer):
+    author = BatchPrimaryKeyRelatedField(queryset=User.objects.all(), allow_null=True, required=False)
+
+
+class LessonImportSerializer(LessonSerializer):
+    course = BatchPrimaryKeyRelatedField(queryset=Course.objects.all(), allow_null=True, required=False)
+    author = BatchPrimaryKeyRelatedField(queryset=User.objects.all(), allow_null=True, required=False)
+
+
+class PaymentsImportSerializer(PaymentsSerializer):
+    paid_by = BatchPrimaryKeyRelatedField(queryset=User.objects.all())
+    course = BatchPrimaryKeyRelatedField(queryset=Course.objects.all(), allow_null=True, required=False)
+    lesson = BatchPrimaryKeyRelatedField(queryset=Lesson.objects.all(), allow_null=True, required=False)
+
+    class Meta(PaymentsSerializer.Meta):
+        read_only_fields = ('stripe_payment_id',)
+
+
+IMPORTERS = {
+    'courses': CourseImportSerializer,
+    'lessons': LessonImportSerializer,
+    'payments': PaymentsImportSerializer,
+}
+
+
+def read_rows(stream, file_format: str):
+    """Генератор строк входного файла в виде словарей. Файлы CSV и NDJSON
+    читаются построчно, JSON (массив объектов) загружается целиком"""
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8')
+
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif file_format == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif file_format == 'json':
+        yield from json.load(stream)
+    else:
+        raise ValueError(f'Неизвестный формат файла: {file_format}')
+
+
+def load_related(serializer_class, rows) -> dict:
+    """Функция загружает объекты, на которые ссылаются строки пачки,
+    по одному запросу на каждую связанную модель"""
+    pks = {}
+    for name, field in serializer_class().fields.items():
+        if isinstance(field, BatchPrimaryKeyRelatedField):
+            model_pks = pks.setdefault(field.queryset.model, set())
+            for row in rows:
+                try:
+                    model_pks.add(int(row[name]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+    return {model: model.objects.in_bulk(model_pks) for model, model_pks in pks.items()}
+
+
+def import_rows(kind: str, rows, chunk_size: int = None) -> dict:
+    """Функция импортирует объекты заданного типа (courses, lessons, payments).
+    Строки проверяются пачками по правилам сериализаторов API, корректные
+    строки каждой пачки сохраняются одним bulk_create. Возвращает отчёт
+    с количеством созданных объектов и ошибками по номерам строк"""
+    started = time.monotonic()
+    serializer_class = IMPORTERS[kind]
+    model = serializer_class.Meta.model
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+
+    report = {'total': 0, 'created': 0, 'errors': []}
+    numbered_rows = enumerate(rows, start=1)
+    while batch := list(islice(numbered_rows, chunk_size)):
+        context = {'related': load_related(serializer_class, [row for _, row in batch])}
+        objects = []
+        for number, row in batch:
+            serializer = serializer_class(data=row, context=context)
+            if serializer.is_valid():
+                objects.append(model(**serializer.validated_data))
+            else:
+                report['errors'].append({'row': number, 'errors': serializer.errors})
+
+        with transaction.atomic():
+            created = model.objects.bulk_create(objects)
+            _refresh_courses(kind, created)
+        report['total'] += len(batch)
+        report['created'] += len(created)
+
+    report['failed'] = len(report['errors'])
+    report['duration'] = round(time.monotonic() - started, 3)
+    return report
+
+
+def _refresh_courses(kind, objects) -> None:
+    """bulk_create не отправляет сигналы, поэтому статистику и версии
+    затронутых курсов, резервный поисковый индекс и закэшированные ответы
+    по урокам обновляем явно"""
+    if kind == 'payments' and objects:
+        bump_payments_analytics_version()
+    else:
+        invalidate_search_index(IMPORTERS[kind].Meta.model)
+        invalidate_lessons_cache()
+    if kind == 'courses':
+        course_pks = {obj.pk for obj in objects}
+    else:
+        course_pks = {obj.course_id for obj in objects if obj.course_id}
+    if not course_pks:
+        return
+
+    rebuild_course_stats(course_pks)
+    if kind == 'lessons':
+        for course_pk in course_pks:
+            bump_course_version(course_pk)
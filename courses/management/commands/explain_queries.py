@@ -0,0 +1,91 @@
+import re
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from config import settings
+from courses.models import Course, Lesson, Payments, Subscription
+from courses.views import CourseViewSet, LessonListAPIView, LessonDetailAPIView, PaymentsViewSet
+from users.models import User
+
+# Строки плана запроса, означающие полный просмотр таблицы
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+}
+
+
+def endpoint_queries(user_pk, course_pk, lesson_pk) -> dict:
+    """Запросы, выполняемые основными эндпоинтами, с подставленными
+    значениями параметров"""
+    cutoff = timezone.now() - settings.USER_INACTIVITY_PERIOD
+    return {
+        'lessons_list': LessonListAPIView.queryset.filter(author=user_pk),
+        'lessons_detail': LessonDetailAPIView.queryset.filter(pk=lesson_pk),
+        'courses_list': CourseViewSet.querysets['list'].filter(author=user_pk),
+        'courses_detail': CourseViewSet.querysets['retrieve'].filter(pk=course_pk),
+        'course_is_subscribed': Subscription.objects.filter(user=user_pk, course=course_pk).values('pk')[:1],
+        'course_subscribers': Subscription.objects.filter(course=course_pk).values_list('user__email'),
+        'payments_by_course': PaymentsViewSet.queryset.filter(course=course_pk),
+        'payments_by_lesson': PaymentsViewSet.queryset.filter(lesson=lesson_pk),
+        'payments_by_way': PaymentsViewSet.queryset.filter(payment_way='cash'),
+        'user_payments': Payments.objects.filter(paid_by=user_pk).order_by('-payment_date', '-pk')[:5],
+        'payments_analytics': Payments.objects.filter(
+            status=Payments.STATUS_SUCCEEDED, payment_date__gte=cutoff.date()
+        ).values('payment_date'),
+        'inactive_users': User.objects.filter(
+            is_active=True, last_login__lt=cutoff, pk__gt=0
+        ).order_by('pk').values_list('pk', flat=True)[:settings.USER_DEACTIVATION_CHUNK_SIZE],
+    }
+
+
+def find_seq_scans(plan: str) -> list:
+    """Таблицы, которые просматриваются планом запроса целиком"""
+    pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        return []
+    return [match.group(1) for line in plan.splitlines() if (match := pattern.search(line.strip()))]
+
+
+class Command(BaseCommand):
+    help = 'Вывод планов (EXPLAIN) запросов основных эндпоинтов с отметкой полных просмотров таблиц. ' \
+           'На маленьких таблицах PostgreSQL выбирает полный просмотр независимо от индексов, ' \
+           'поэтому проверку стоит выполнять на БД с данными, близкими к рабочим'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', nargs='+', dest='queries', help='имена проверяемых запросов')
+        parser.add_argument('--analyze', action='store_true', help='выполнить EXPLAIN ANALYZE (только PostgreSQL)')
+        parser.add_argument('--plans', action='store_true', help='выводить планы запросов целиком')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='завершиться с ошибкой при обнаружении полного просмотра')
+
+    def handle(self, *args, **options):
+        queries = endpoint_queries(
+            user_pk=User.objects.values_list('pk', flat=True).first() or 0,
+            course_pk=Course.objects.values_list('pk', flat=True).first() or 0,
+            lesson_pk=Lesson.objects.values_list('pk', flat=True).first() or 0,
+        )
+        unknown = set(options['queries'] or []) - queries.keys()
+        if unknown:
+            raise CommandError(f'Неизвестные запросы: {", ".join(sorted(unknown))}. '
+                               f'Доступны: {", ".join(queries)}')
+
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+        flagged = []
+        for name, queryset in queries.items():
+            if options['queries'] and name not in options['queries']:
+                continue
+            plan = queryset.explain(**explain_options)
+            seq_scans = find_seq_scans(plan)
+            if seq_scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f'{name}: полный просмотр {", ".join(seq_scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+            if options['plans']:
+                self.stdout.write(plan + '\n')
+
+        self.stdout.write(f'Запросов с полным просмотром таблиц: {len(flagged)}')
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(f'Полный просмотр таблиц в запросах: {", ".join(flagged)}')
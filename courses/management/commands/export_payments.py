@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand, CommandError
+
+from courses.exports import EXPORT_FORMATS, export_payments, filter_payments
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка платежей в формате CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', dest='file_format',
+                            help='формат выгрузки')
+        parser.add_argument('--output', help='путь к файлу выгрузки (по умолчанию - стандартный вывод)')
+        parser.add_argument('--course', help='id курса')
+        parser.add_argument('--lesson', help='id урока')
+        parser.add_argument('--payment-way', help='способ оплаты')
+
+    def handle(self, *args, **options):
+        params = {
+            field: options[field]
+            for field in ('course', 'lesson', 'payment_way')
+            if options[field] is not None
+        }
+        try:
+            queryset = filter_payments(params)
+        except ValueError as error:
+            raise CommandError(error)
+
+        lines = export_payments(queryset, options['file_format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(lines)
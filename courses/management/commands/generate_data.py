@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from courses.benchmarks import BENCHMARK_PASSWORD, DEFAULT_VOLUMES, generate_data
+
+
+class Command(BaseCommand):
+    help = 'Создание набора данных для нагрузочного тестирования (run_benchmarks)'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default, dest=name,
+                                help=f'по умолчанию {default}')
+        parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        created = generate_data({name: options[name] for name in DEFAULT_VOLUMES}, seed=options['seed'])
+        for name, total in created.items():
+            self.stdout.write(f'{name}: {total}')
+        self.stdout.write(f'Пароль созданных пользователей: {BENCHMARK_PASSWORD}')
@@ -0,0 +1,38 @@
+import json
+import os
+
+from django.core.management import BaseCommand, CommandError
+
+from courses.importers import IMPORT_FORMATS, IMPORTERS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Массовая загрузка курсов, уроков или платежей из файла CSV, NDJSON или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS), help='тип загружаемых объектов')
+        parser.add_argument('path', help='путь к файлу')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, dest='file_format',
+                            help='формат файла (по умолчанию - по расширению)')
+        parser.add_argument('--chunk-size', type=int,
+                            help='количество строк, сохраняемых одним запросом')
+        parser.add_argument('--report', help='путь к файлу отчёта об ошибках в формате JSON')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError('Не удалось определить формат файла, укажите --format')
+
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            report = import_rows(options['kind'], read_rows(stream, file_format), options['chunk_size'])
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+        else:
+            for error in report['errors']:
+                self.stdout.write(f'Строка {error["row"]}: {error["errors"]}')
+        self.stdout.write(
+            f'Обработано строк: {report["total"]}, создано: {report["created"]}, '
+            f'с ошибками: {report["failed"]}, время: {report["duration"]} с'
+        )
@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand
+
+from courses.stats import check_course_stats, rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Полный пересчёт статистики курсов по исходным данным'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='только сравнить сохранённую статистику с фактической')
+        parser.add_argument('--course', type=int, nargs='+', dest='courses',
+                            help='id курсов для пересчёта (по умолчанию - все курсы)')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = check_course_stats(options['courses'])
+            for mismatch in mismatches:
+                self.stdout.write(
+                    f'Курс {mismatch["course"]}: сохранено {mismatch["stored"]}, '
+                    f'фактически {mismatch["actual"]}'
+                )
+            self.stdout.write(f'Найдено расхождений: {len(mismatches)}')
+            return
+
+        total = rebuild_course_stats(options['courses'])
+        self.stdout.write(f'Статистика пересчитана для курсов: {total}')
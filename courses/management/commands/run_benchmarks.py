@@ -0,0 +1,44 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+
+from courses.benchmarks import compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочное тестирование эндпоинтов API: перцентили времени ответа, ' \
+           'пропускная способность и количество запросов к БД. Данные создаются командой generate_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='количество запросов в каждом сценарии')
+        parser.add_argument('--warmup', type=int, default=5, help='количество прогревочных запросов')
+        parser.add_argument('--scenario', nargs='+', dest='scenarios', help='имена выполняемых сценариев')
+        parser.add_argument('--output', help='путь к файлу JSON для сохранения результатов')
+        parser.add_argument('--compare', help='путь к файлу JSON с результатами базового прогона')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='допустимый рост p95 относительно базового прогона, в процентах')
+
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmarks(options['requests'], options['warmup'], options['scenarios'])
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f'{"сценарий":<26}{"p50":>9}{"p95":>9}{"p99":>9}{"rps":>9}{"запросы":>10}')
+        for name, result in results['scenarios'].items():
+            self.stdout.write(
+                f'{name:<26}{result["p50_ms"]:>9}{result["p95_ms"]:>9}{result["p99_ms"]:>9}'
+                f'{result["throughput_rps"]:>9}{result["queries_max"]:>10}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline:
+                regressions = compare_results(json.load(baseline), results, options['threshold'])
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(regression))
+            if regressions:
+                raise CommandError(f'Обнаружено регрессий: {len(regressions)}')
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_course_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payments',
+            name='idempotency_key',
+            field=models.UUIDField(blank=True, null=True, verbose_name='ключ идемпотентности'),
+        ),
+        migrations.AddField(
+            model_name='payments',
+            name='status',
+            field=models.CharField(choices=[('pending', 'в обработке'), ('succeeded', 'проведён'), ('failed', 'отклонён')], default='succeeded', max_length=10, verbose_name='статус'),
+        ),
+        migrations.AddField(
+            model_name='payments',
+            name='stripe_payment_id',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='id платежа в STRIPE'),
+        ),
+    ]
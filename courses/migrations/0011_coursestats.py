@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_course_stats(apps, schema_editor):
+    """Заполняем статистику для существующих курсов"""
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Payments = apps.get_model('courses', 'Payments')
+    Subscription = apps.get_model('courses', 'Subscription')
+
+    def aggregate_subquery(model, aggregate, **filters):
+        subquery = model.objects.filter(course=OuterRef('pk'), **filters).order_by().values('course')
+        return Coalesce(Subquery(subquery.annotate(value=aggregate).values('value')), 0)
+
+    rows = Course.objects.annotate(
+        lesson_count=aggregate_subquery(Lesson, Count('pk')),
+        subscriber_count=aggregate_subquery(Subscription, Count('pk')),
+        payment_count=aggregate_subquery(Payments, Count('pk'), status='succeeded'),
+        revenue_total=aggregate_subquery(Payments, Sum('amount'), status='succeeded'),
+    ).values('pk', 'lesson_count', 'subscriber_count', 'payment_count', 'revenue_total')
+    CourseStats.objects.bulk_create(
+        [CourseStats(course_id=row.pop('pk'), **row) for row in rows.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_payments_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course', verbose_name='курс')),
+                ('lesson_count', models.IntegerField(default=0, verbose_name='количество уроков')),
+                ('subscriber_count', models.IntegerField(default=0, verbose_name='количество подписчиков')),
+                ('payment_count', models.IntegerField(default=0, verbose_name='количество оплат')),
+                ('revenue_total', models.BigIntegerField(default=0, verbose_name='сумма оплат')),
+            ],
+            options={
+                'verbose_name': 'статистика курса',
+                'verbose_name_plural': 'статистика курсов',
+            },
+        ),
+        migrations.RunPython(fill_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:01
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_coursestats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payments',
+            name='payment_date',
+            field=models.DateField(default=datetime.date.today, verbose_name='дата оплаты'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_TABLES = ('courses_course', 'courses_lesson')
+
+CREATE_SEARCH_SQL = """
+CREATE FUNCTION courses_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+CREATE_TABLE_SEARCH_SQL = """
+CREATE TRIGGER {table}_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description ON {table}
+    FOR EACH ROW EXECUTE FUNCTION courses_search_vector_update();
+UPDATE {table} SET title = title;
+CREATE INDEX {table}_search_vector_gin ON {table} USING gin (search_vector);
+"""
+
+DROP_TABLE_SEARCH_SQL = """
+DROP INDEX IF EXISTS {table}_search_vector_gin;
+DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table};
+"""
+
+DROP_SEARCH_SQL = "DROP FUNCTION IF EXISTS courses_search_vector_update();"
+
+
+def create_search_triggers(apps, schema_editor):
+    """Поисковый вектор поддерживается триггером, поэтому он актуален
+    и при массовых операциях (bulk_create, update), которые не отправляют
+    сигналы. Триггеры и GIN индексы создаются только в PostgreSQL,
+    в остальных СУБД используется резервный поиск courses.search"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_SEARCH_SQL)
+    for table in SEARCH_TABLES:
+        schema_editor.execute(CREATE_TABLE_SEARCH_SQL.format(table=table))
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(DROP_TABLE_SEARCH_SQL.format(table=table))
+    schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_alter_payments_payment_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:06
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_subscriptions(apps, schema_editor):
+    """Перед созданием ограничения уникальности удаляем повторные подписки
+    пользователей на курс и пересчитываем количество подписчиков затронутых курсов"""
+    Subscription = apps.get_model('courses', 'Subscription')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+
+    duplicates = Subscription.objects.values('user', 'course').annotate(
+        total=Count('pk'), keep=Min('pk')
+    ).filter(total__gt=1).order_by()
+    course_pks = set()
+    for row in duplicates.iterator():
+        Subscription.objects.filter(user=row['user'], course=row['course']).exclude(pk=row['keep']).delete()
+        course_pks.add(row['course'])
+    for course_pk in course_pks:
+        CourseStats.objects.filter(course=course_pk).update(
+            subscriber_count=Subscription.objects.filter(course=course_pk).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['author', 'id'], name='course_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['author', 'id'], name='lesson_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payments',
+            index=models.Index(fields=['course', '-payment_date'], name='payment_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payments',
+            index=models.Index(fields=['lesson', '-payment_date'], name='payment_lesson_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payments',
+            index=models.Index(fields=['payment_way', '-payment_date'], name='payment_way_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payments',
+            index=models.Index(condition=models.Q(('status', 'succeeded')), fields=['payment_date'], name='payment_succeeded_date_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_subscriptions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='unique_user_course_subscription'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_lesson_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payments',
+            index=models.Index(fields=['paid_by', '-payment_date'], name='payment_paid_by_date_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from datetime import date
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from config import settings
@@ -13,6 +16,8 @@ class Course(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
                                **NULLABLE, verbose_name='автор')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='время последнего обновления')
+    # Заполняется триггером БД по названию и описанию (см. courses.search)
+    search_vector = SearchVectorField(editable=False, verbose_name='поисковый вектор', **NULLABLE)
 
     def __str__(self):
         return f'{self.title}'
@@ -20,6 +25,10 @@ class Course(models.Model):
     class Meta:
         verbose_name = 'курс'
         verbose_name_plural = 'курсы'
+        indexes = [
+            # Список курсов пользователя, не входящего в группу Модераторов
+            models.Index(fields=['author', 'id'], name='course_author_id_idx'),
+        ]
 
 
 class Lesson(models.Model):
@@ -32,13 +41,29 @@ class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, **NULLABLE, verbose_name='курс')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
                                **NULLABLE, verbose_name='автор')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='время последнего обновления')
+    # Заполняется триггером БД по названию и описанию (см. courses.search)
+    search_vector = SearchVectorField(editable=False, verbose_name='поисковый вектор', **NULLABLE)
 
     def __str__(self):
         return f'{self.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем курс, к которому урок был привязан при загрузке из БД,
+        чтобы при переносе урока обновить данные обоих курсов"""
+        instance = super().from_db(db, field_names, values)
+        if 'course_id' in instance.__dict__:
+            instance._loaded_course_id = instance.course_id
+        return instance
+
     class Meta:
         verbose_name = 'урок'
         verbose_name_plural = 'уроки'
+        indexes = [
+            # Список уроков пользователя, не входящего в группу Модераторов
+            models.Index(fields=['author', 'id'], name='lesson_author_id_idx'),
+        ]
 
 
 class Payments(models.Model):
@@ -49,21 +74,62 @@ class Payments(models.Model):
         ('transaction', 'paid_by_transaction'),
     ]
 
+    STATUS_PENDING = 'pending'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'в обработке'),
+        (STATUS_SUCCEEDED, 'проведён'),
+        (STATUS_FAILED, 'отклонён'),
+    ]
+
     paid_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name='плательщик')
-    payment_date = models.DateField(auto_now_add=True, verbose_name='дата оплаты')
+    payment_date = models.DateField(default=date.today, verbose_name='дата оплаты')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name='курс', **NULLABLE)
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, verbose_name='урок', **NULLABLE)
     amount = models.PositiveIntegerField(verbose_name='сумма')
     payment_way = models.CharField(max_length=12, choices=PAYMENT_WAY_CHOICES, verbose_name='способ оплаты')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_SUCCEEDED,
+                              verbose_name='статус')
+    idempotency_key = models.UUIDField(verbose_name='ключ идемпотентности', **NULLABLE)
+    stripe_payment_id = models.CharField(max_length=50, verbose_name='id платежа в STRIPE', **NULLABLE)
 
     def __str__(self):
         return f'Оплата {self.paid_by} ' \
                f'за {self.course.title if self.course else self.lesson.title}'
 
+    @property
+    def stats_contribution(self):
+        """Вклад платежа в статистику курса: (id курса, сумма) для
+        проведённых оплат курса, иначе None"""
+        if self.course_id and self.status == self.STATUS_SUCCEEDED:
+            return self.course_id, self.amount
+        return None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем вклад платежа в статистику курса на момент загрузки из БД,
+        чтобы при изменении платежа скорректировать статистику"""
+        instance = super().from_db(db, field_names, values)
+        if {'course_id', 'status', 'amount'} <= instance.__dict__.keys():
+            instance._loaded_stats_contribution = instance.stats_contribution
+        return instance
+
     class Meta:
         verbose_name = 'платеж'
         verbose_name_plural = 'платежи'
         ordering = ['-payment_date']
+        indexes = [
+            # Фильтры списка платежей с сортировкой по дате
+            models.Index(fields=['course', '-payment_date'], name='payment_course_date_idx'),
+            models.Index(fields=['lesson', '-payment_date'], name='payment_lesson_date_idx'),
+            models.Index(fields=['payment_way', '-payment_date'], name='payment_way_date_idx'),
+            # История платежей пользователя
+            models.Index(fields=['paid_by', '-payment_date'], name='payment_paid_by_date_idx'),
+            # Отчёты по проведённым платежам за период
+            models.Index(fields=['payment_date'], condition=models.Q(status='succeeded'),
+                         name='payment_succeeded_date_idx'),
+        ]
 
 
 class Subscription(models.Model):
@@ -78,3 +144,27 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = 'подписка'
         verbose_name_plural = 'подписки'
+        constraints = [
+            # Индекс ограничения используется и для поиска подписки пользователя на курс
+            models.UniqueConstraint(fields=['user', 'course'], name='unique_user_course_subscription'),
+        ]
+
+
+class CourseStats(models.Model):
+    """Модель агрегированной статистики курса. Поддерживается в актуальном
+    состоянии при изменении уроков, подписок и платежей, полностью
+    пересчитывается командой rebuild_course_stats"""
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='stats', verbose_name='курс')
+    lesson_count = models.IntegerField(default=0, verbose_name='количество уроков')
+    subscriber_count = models.IntegerField(default=0, verbose_name='количество подписчиков')
+    payment_count = models.IntegerField(default=0, verbose_name='количество оплат')
+    revenue_total = models.BigIntegerField(default=0, verbose_name='сумма оплат')
+
+    def __str__(self):
+        return f'Статистика курса {self.course_id}'
+
+    class Meta:
+        verbose_name = 'статистика курса'
+        verbose_name_plural = 'статистика курсов'
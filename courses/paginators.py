@@ -1,6 +1,63 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination, BasePagination
+
+from config import settings
 
 
 class SimplePaginator(PageNumberPagination):
     """Класс для добавления пагинации"""
     page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+
+class KeysetPaginator(CursorPagination):
+    """Класс для добавления пагинации по курсору. Страница выбирается
+    условием по первичному ключу без OFFSET и без подсчёта общего
+    количества объектов, поэтому любая страница выдаётся так же быстро,
+    как первая"""
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+    ordering = '-pk'
+
+
+class PaymentsKeysetPaginator(KeysetPaginator):
+    """Пагинация истории платежей по курсору в том же порядке,
+    что и при пагинации по номеру страницы"""
+    ordering = ('-payment_date', '-pk')
+
+
+class FlexiblePaginator(BasePagination):
+    """Класс позволяет клиенту выбрать способ пагинации для каждого запроса:
+    по номеру страницы (по умолчанию) или по курсору (?pagination=cursor).
+    При пагинации по курсору объекты сортируются по полям ordering
+    класса cursor_paginator_class"""
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_paginator_class = KeysetPaginator
+
+    def __init__(self):
+        self.paginator = SimplePaginator()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode \
+                or self.cursor_paginator_class.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_paginator_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.paginator.get_schema_operation_parameters(view)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class PaymentsPaginator(FlexiblePaginator):
+    """Пагинация истории платежей: от новых платежей к старым"""
+    cursor_paginator_class = PaymentsKeysetPaginator
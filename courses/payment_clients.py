@@ -0,0 +1,80 @@
+import uuid
+
+import stripe
+from django.utils.module_loading import import_string
+
+from config import settings
+
+
+class StripeClient:
+    """Клиент для проведения платежей через API сервиса STRIPE.COM"""
+
+    def __init__(self):
+        # Ключ для работы с API сервиса STRIPE.COM
+        stripe.api_key = settings.STRIPE_API_KEY
+
+    def create_payment_method(self, idempotency_key: str) -> str:
+        """Создаём объект класса PaymentMethod - способ оплаты, возвращаем его id"""
+        pay_method = stripe.PaymentMethod.create(
+            type="card",
+            card={
+                "number": "4242424242424242",
+                "exp_month": 12,
+                "exp_year": 2034,
+                "cvc": "314",
+            },
+            idempotency_key=idempotency_key,
+        )
+        return pay_method['id']
+
+    def create_payment_intent(self, amount: int, payment_method: str,
+                              description: str, idempotency_key: str) -> dict:
+        """Проводим платёж с автоматическим подтверждением (confirm=True),
+        возвращаем id и статус платежа"""
+        new_pay = stripe.PaymentIntent.create(
+            amount=amount,
+            currency="usd",
+            payment_method=payment_method,
+            automatic_payment_methods={"enabled": True, "allow_redirects": "never"},
+            confirm=True,
+            description=description,
+            idempotency_key=idempotency_key,
+        )
+        return {'id': new_pay['id'], 'status': new_pay['status']}
+
+
+class FakeStripeClient:
+    """Локальная замена StripeClient для тестов и разработки без доступа
+    к STRIPE.COM. Повторный запрос с тем же ключом идемпотентности
+    возвращает сохранённый ранее результат, как и настоящий API"""
+
+    # Статус, с которым завершаются платежи
+    status = 'succeeded'
+    # Очередь исключений, выбрасываемых при следующих вызовах API
+    errors = []
+    # Результаты вызовов API по ключам идемпотентности
+    requests = {}
+
+    def _call(self, idempotency_key, result):
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.requests.setdefault(idempotency_key, result)
+
+    def create_payment_method(self, idempotency_key: str) -> str:
+        return self._call(idempotency_key, f'pm_{uuid.uuid4().hex}')
+
+    def create_payment_intent(self, amount: int, payment_method: str,
+                              description: str, idempotency_key: str) -> dict:
+        return self._call(idempotency_key, {'id': f'pi_{uuid.uuid4().hex}', 'status': self.status})
+
+    @classmethod
+    def reset(cls):
+        """Возвращает заглушку в исходное состояние"""
+        cls.status = 'succeeded'
+        cls.errors = []
+        cls.requests = {}
+
+
+def get_payment_client():
+    """Функция возвращает клиент платёжного сервиса, заданный в настройках"""
+    return import_string(settings.PAYMENT_CLIENT)()
@@ -0,0 +1,135 @@
+import html
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Coalesce
+from rest_framework.filters import BaseFilterBackend
+
+# Конфигурация полнотекстового поиска PostgreSQL. Используется триггером,
+# заполняющим поле search_vector (миграция 0013_search_vector)
+SEARCH_CONFIG = 'russian'
+
+# Веса совпадений в названии и описании для резервного индекса
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+SNIPPET_START, SNIPPET_STOP = '<b>', '</b>'
+SNIPPET_WORDS = 20
+
+
+def tokenize(text: str) -> list:
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def search(queryset, query: str):
+    """Функция возвращает объекты queryset (курсы или уроки), соответствующие
+    поисковому запросу, упорядоченные по релевантности. Каждое слово
+    запроса ищется как префикс. Объекты дополняются полями rank и snippet -
+    фрагментом описания с выделенными совпадениями"""
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, terms)
+    return _fallback_search(queryset, terms)
+
+
+def _postgres_search(queryset, terms):
+    """Поиск по полю search_vector с GIN индексом"""
+    search_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        snippet=SearchHeadline(
+            Coalesce('description', 'title'), search_query, config=SEARCH_CONFIG,
+            start_sel=SNIPPET_START, stop_sel=SNIPPET_STOP, max_words=SNIPPET_WORDS
+        ),
+    ).order_by('-rank', 'pk')
+
+
+class InvertedIndex:
+    """Простой инвертированный индекс в памяти процесса по названию
+    и описанию объектов. Используется вместо полнотекстового поиска
+    PostgreSQL при работе с другими СУБД (SQLite в тестах)"""
+
+    def __init__(self, model):
+        self.postings = defaultdict(dict)
+        self.texts = {}
+        for pk, title, description in model.objects.values_list('pk', 'title', 'description').iterator():
+            self.texts[pk] = description or title or ''
+            for weight, text in ((TITLE_WEIGHT, title), (DESCRIPTION_WEIGHT, description)):
+                for token in tokenize(text):
+                    self.postings[token][pk] = self.postings[token].get(pk, 0) + weight
+        self.tokens = sorted(self.postings)
+
+    def lookup(self, term: str) -> dict:
+        """Объекты, содержащие слова, начинающиеся с term, и их вес"""
+        matches = defaultdict(float)
+        for token in self.tokens[bisect_left(self.tokens, term):]:
+            if not token.startswith(term):
+                break
+            for pk, weight in self.postings[token].items():
+                matches[pk] += weight
+        return matches
+
+    def search(self, terms) -> dict:
+        """Объекты, содержащие все слова запроса, и их релевантность"""
+        ranks = None
+        for term in terms:
+            matches = self.lookup(term)
+            if ranks is None:
+                ranks = dict(matches)
+            else:
+                ranks = {pk: rank + matches[pk] for pk, rank in ranks.items() if pk in matches}
+        return ranks or {}
+
+    def snippet(self, pk, terms) -> str:
+        """Фрагмент текста объекта с выделенными совпадениями"""
+        words = self.texts.get(pk, '').split()
+        matched = [i for i, word in enumerate(words) if any(token.startswith(tuple(terms)) for token in tokenize(word))]
+        start = max(matched[0] - SNIPPET_WORDS // 2, 0) if matched else 0
+        fragment = words[start:start + SNIPPET_WORDS]
+        return ' '.join(
+            f'{SNIPPET_START}{html.escape(word)}{SNIPPET_STOP}' if start + i in matched else html.escape(word)
+            for i, word in enumerate(fragment)
+        )
+
+
+_indexes = {}
+
+
+def get_index(model) -> InvertedIndex:
+    if model not in _indexes:
+        _indexes[model] = InvertedIndex(model)
+    return _indexes[model]
+
+
+def invalidate_search_index(model) -> None:
+    """Функция сбрасывает резервный индекс модели, он будет построен
+    заново при следующем поиске"""
+    _indexes.pop(model, None)
+
+
+def _fallback_search(queryset, terms):
+    index = get_index(queryset.model)
+    ranks = index.search(terms)
+    if not ranks:
+        return queryset.none()
+    return queryset.filter(pk__in=ranks).annotate(
+        rank=Case(*[When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()], output_field=FloatField()),
+        snippet=Case(*[When(pk=pk, then=Value(index.snippet(pk, terms))) for pk in ranks]),
+    ).order_by('-rank', 'pk')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Фильтр списков курсов и уроков по поисковому запросу (?search=)"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search(queryset, query)
@@ -1,18 +1,49 @@
 from rest_framework import serializers
 from rest_framework import fields
 
+from config import settings
+from config.fieldsets import SparseFieldsetSerializerMixin
+from courses.analytics import GROUPINGS
+from courses.cache import get_request_subscriptions
 from courses.models import Lesson, Course, Payments, Subscription
 from courses.validators import ValidateURL
+from users.models import User
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+    """Краткое представление автора (для ?expand=author)"""
+
+    class Meta:
+        model = User
+        fields = ('id', 'email')
+
+
+class CourseShortSerializer(serializers.ModelSerializer):
+    """Краткое представление курса (для ?expand=course)"""
+
+    class Meta:
+        model = Course
+        fields = ('id', 'title')
+
+
+class LessonShortSerializer(serializers.ModelSerializer):
+    """Краткое представление урока (для ?expand=lesson)"""
+
+    class Meta:
+        model = Lesson
+        fields = ('id', 'title')
+
+
+class LessonSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'course': CourseShortSerializer, 'author': AuthorSerializer}
 
     class Meta:
         model = Lesson
-        exclude = ('preview',)
+        exclude = ('preview', 'search_vector')
+        extra_kwargs = {'link': {'validators': [ValidateURL()]}}
 
 
-class LessonDetailSerializer(serializers.ModelSerializer):
+class LessonDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     author = serializers.SerializerMethodField(read_only=True)
     course = serializers.SerializerMethodField(read_only=True)
 
@@ -30,18 +61,23 @@ class LessonDetailSerializer(serializers.ModelSerializer):
 class CourseDefaultSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
-        exclude = ('preview',)
+        exclude = ('preview', 'search_vector')
+
 
+class CourseListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'author': AuthorSerializer}
+    lesson_quantity = fields.IntegerField(source='stats.lesson_count', default=0, read_only=True)
+    is_subscribed = serializers.SerializerMethodField(read_only=True)
 
-class CourseListSerializer(serializers.ModelSerializer):
-    lesson_quantity = fields.IntegerField()
+    def get_is_subscribed(self, obj):
+        return obj.pk in get_request_subscriptions(self.context['request'])
 
     class Meta:
         model = Course
-        exclude = ('preview',)
+        exclude = ('preview', 'search_vector')
 
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     lessons_list = LessonDetailSerializer(source='lesson_set', many=True)
     author = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -50,23 +86,44 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         return obj.author.email if obj.author else None
 
     def get_is_subscribed(self, obj):
-        subs = Subscription.objects.filter(
-            user=self.context['request'].user,
-            course=obj.pk
-        )
-        return subs.exists()
+        return obj.pk in get_request_subscriptions(self.context['request'])
 
     class Meta:
         model = Course
-        exclude = ('preview',)
+        exclude = ('preview', 'search_vector')
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Результат полнотекстового поиска курсов и уроков"""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    rank = serializers.FloatField()
+    snippet = serializers.CharField(allow_null=True)
+
 
+class SearchQuerySerializer(serializers.Serializer):
+    """Параметры запроса полнотекстового поиска"""
+    TYPES = ('courses', 'lessons')
 
-class PaymentsSerializer(serializers.ModelSerializer):
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(choices=TYPES, default='courses')
+
+
+class PaymentsSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'course': CourseShortSerializer, 'lesson': LessonShortSerializer}
     paid_by = serializers.CharField(max_length=50, source='paid_by.username')
 
     class Meta:
         model = Payments
-        fields = '__all__'
+        exclude = ('idempotency_key',)
+        read_only_fields = ('payment_date', 'status', 'stripe_payment_id')
+
+
+class PaymentStatusSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Payments
+        fields = ('id', 'course', 'amount', 'payment_date', 'status')
 
 
 class PaymentsForUserSerializer(serializers.ModelSerializer):
@@ -84,7 +141,7 @@ class PaymentsForUserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Payments
-        fields = ['payment_date', 'amount', 'payment_way', 'paid_for']
+        fields = ['id', 'payment_date', 'amount', 'payment_way', 'status', 'paid_for']
 
 
 class CourseSubscribeSerializer(serializers.ModelSerializer):
@@ -93,3 +150,42 @@ class CourseSubscribeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Subscription
         fields = ('subscribe',)
+
+
+class CourseBatchSubscribeSerializer(CourseSubscribeSerializer):
+    """Подписка на несколько курсов (или отмена подписок) одним запросом"""
+    courses = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                    max_length=settings.MAX_PAGE_SIZE)
+
+    class Meta(CourseSubscribeSerializer.Meta):
+        fields = ('subscribe', 'courses')
+
+
+class PaymentsAnalyticsQuerySerializer(serializers.Serializer):
+    """Сериализатор параметров запроса отчёта по платежам"""
+    group_by = serializers.ChoiceField(choices=list(GROUPINGS), default='month')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError('date_from не может быть позже date_to')
+        return attrs
+
+
+class LessonBatchOperationSerializer(serializers.Serializer):
+    """Сериализатор отдельной операции пакетного изменения уроков"""
+    ACTIONS = ('create', 'update', 'delete')
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['action'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'Для изменения и удаления урока требуется id'})
+        return attrs
+
+
+class LessonBatchSerializer(serializers.Serializer):
+    operations = LessonBatchOperationSerializer(many=True, allow_empty=False)
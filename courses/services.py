@@ -1,70 +1,135 @@
-from rest_framework import status
-from rest_framework.response import Response
-
-from courses.models import Course, Subscription, Payments
-from courses.tasks import send_mail_about_update
-
-import stripe
-from config.settings import STRIPE_API_KEY
-
-
-def check_subscription(course: Course) -> None:
-    """Функция проверяет наличие подписок для заданного курса.
-    Для каждой найденной подписки запускается фоновая задача"""
-
-    subscriptions = Subscription.objects.filter(course=course)
-    if subscriptions:
-        for subscription in subscriptions:
-            send_mail_about_update.delay(subscription.user.email, course.title)
-
-
-def make_payment(course_pk: int, request_data):
-    """Функция включает весь функционал по выполнению оплаты пользователем
-    за выбранный курс"""
-    # Ключ для работы с API сервиса STRIPE.COM
-    stripe.api_key = STRIPE_API_KEY
-    # Оплачиваемый курс
-    course = Course.objects.get(pk=course_pk)
-    # Условная цена за курс
-    price = 2000
-
-    # Создаём объект класса PaymentMethod - способ оплаты
-    pay_method = stripe.PaymentMethod.create(
-        type="card",
-        card={
-            "number": "4242424242424242",
-            "exp_month": 12,
-            "exp_year": 2034,
-            "cvc": "314",
-        },
-    )
-    id_pay_method = pay_method['id']
-
-    # Проводим платёж за курс с автоматическим подтверждением
-    # платежа (confirm=True)
-    new_pay = stripe.PaymentIntent.create(
-        amount=price,
-        currency="usd",
-        payment_method=id_pay_method,
-        automatic_payment_methods={"enabled": True, "allow_redirects": "never"},
-        confirm=True,
-        description=f'Payment for learning course "{course}"'
-    )
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from config import settings
+from courses.cache import get_user_subscriptions, invalidate_user_subscriptions
+from courses.models import Course, Payments, Subscription
+from courses.stats import adjust_courses_stats
+from courses.tasks import COURSE_NOTIFICATION_CACHE_KEY, notify_course_subscribers, process_payment
+
+# Условная цена за курс
+COURSE_PRICE = 2000
+
+
+def schedule_course_notification(course_pk: int) -> None:
+    """Функция планирует рассылку уведомлений подписчикам курса через
+    COURSE_NOTIFICATION_WINDOW секунд. Все обновления курса в течение этого
+    окна объединяются в одну рассылку: пока в кэше есть отметка о
+    запланированной рассылке, новая задача не ставится. Отметка и задача
+    создаются после фиксации транзакции, поэтому отменённое обновление
+    не блокирует рассылку. Задача получает токен рассылки, по которому
+    повторная доставка задачи брокером не приводит к повторной рассылке"""
+    window = settings.COURSE_NOTIFICATION_WINDOW
+
+    def schedule():
+        # cache.add атомарно создаёт отметку, только если её ещё нет
+        if cache.add(COURSE_NOTIFICATION_CACHE_KEY.format(course_pk), True, timeout=window * 2):
+            notify_course_subscribers.apply_async((course_pk,), {'token': uuid.uuid4().hex}, countdown=window)
+
+    transaction.on_commit(schedule)
+
+
+def touch_courses(course_pks) -> None:
+    """Функция обновляет время последнего обновления заданных курсов одним
+    запросом и планирует рассылку уведомлений по каждому из них"""
+    Course.objects.filter(pk__in=course_pks).update(updated_at=timezone.now())
+    for course_pk in course_pks:
+        schedule_course_notification(course_pk)
+
 
-    # Сохраняем информацию о платеже в БЛ
+def make_payment(course_pk: int, user) -> Payments:
+    """Функция регистрирует платёж пользователя за выбранный курс в статусе
+    "в обработке" и ставит в очередь фоновую задачу его проведения
+    через STRIPE.COM"""
+    course = get_object_or_404(Course, pk=course_pk)
     payment = Payments.objects.create(
-        paid_by=request_data.user,
+        paid_by_id=user.pk,
         course=course,
-        amount=price,
-        payment_way='transaction'
+        amount=COURSE_PRICE,
+        payment_way='transaction',
+        status=Payments.STATUS_PENDING,
+        idempotency_key=uuid.uuid4()
     )
-    payment.save()
+    # Задача запускается только после фиксации транзакции, иначе воркер
+    # может не найти платёж в БД
+    transaction.on_commit(lambda: process_payment.delay(payment.pk))
+    return payment
 
-    # Выводим ответ в зависимости от успешности проведённого платежа
-    if new_pay['status'] == 'succeeded':
-        return Response({'message': f'Оплата за курс {course.title} выполнена успешно'},
-                        status=status.HTTP_201_CREATED)
-    else:
-        return Response({'message': 'Оплата не прошла, сожалеем!'},
-                        status=status.HTTP_204_NO_CONTENT)
 
+def _subscription_statement(sql: str, user_pk: int, course_pks, subscriber_delta: int) -> list:
+    """Функция выполняет запрос к таблице подписок для пользователя и списка
+    курсов, изменяет количество подписчиков затронутых курсов на
+    subscriber_delta и возвращает их id из RETURNING. Число запросов
+    не зависит от числа курсов"""
+    course_pks = sorted(set(course_pks))
+    if not course_pks:
+        return []
+    quote = connection.ops.quote_name
+    sql = sql.format(
+        subscription=quote(Subscription._meta.db_table),
+        course=quote(Course._meta.db_table),
+        course_pks=', '.join(['%s'] * len(course_pks)),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [user_pk, *course_pks])
+        changed = sorted(row[0] for row in cursor.fetchall())
+        # Запрос выполняется в обход ORM, сигналы не отправляются,
+        # поэтому статистику курсов обновляем явно, одним запросом
+        adjust_courses_stats(changed, subscriber_count=subscriber_delta)
+    return changed
+
+
+def subscribe(user_pk: int, course_pks) -> list:
+    """Функция подписывает пользователя на курсы одним запросом
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING. Повторная подписка
+    и подписка на несуществующий курс пропускаются без ошибок.
+    Возвращает id курсов, подписка на которые оформлена этим вызовом"""
+    added = _subscription_statement(
+        'INSERT INTO {subscription} (user_id, course_id) '
+        'SELECT %s, id FROM {course} WHERE id IN ({course_pks}) '
+        'ON CONFLICT (user_id, course_id) DO NOTHING RETURNING course_id',
+        user_pk, course_pks, subscriber_delta=1
+    )
+    if added:
+        invalidate_user_subscriptions(user_pk)
+    return added
+
+
+def unsubscribe(user_pk: int, course_pks) -> list:
+    """Функция отменяет подписки пользователя на курсы одним запросом
+    DELETE ... RETURNING. Возвращает id курсов, подписка на которые
+    отменена этим вызовом"""
+    removed = _subscription_statement(
+        'DELETE FROM {subscription} WHERE user_id = %s AND course_id IN ({course_pks}) RETURNING course_id',
+        user_pk, course_pks, subscriber_delta=-1
+    )
+    if removed:
+        invalidate_user_subscriptions(user_pk)
+    return removed
+
+
+def get_subscribed_course_pks(user_pk: int, added=(), removed=()) -> list:
+    """Функция возвращает упорядоченный список id курсов, на которые подписан
+    пользователь. В added и removed передаются изменения подписок, внесённые
+    в ещё не зафиксированной транзакции: в кэш они попадут только после её фиксации"""
+    return sorted((get_user_subscriptions(user_pk) | frozenset(added)) - frozenset(removed))
+
+
+def get_payments_summary(user_pk: int) -> dict:
+    """Функция возвращает сводку по платежам пользователя, вычисленную
+    одним агрегирующим запросом: количество платежей, количество и сумму
+    проведённых платежей, дату последнего платежа"""
+    succeeded = Q(status=Payments.STATUS_SUCCEEDED)
+    summary = Payments.objects.filter(paid_by_id=user_pk).aggregate(
+        count=Count('pk'),
+        succeeded_count=Count('pk', filter=succeeded),
+        succeeded_amount=Sum('amount', filter=succeeded),
+        last_payment_date=Max('payment_date'),
+    )
+    summary['succeeded_amount'] = summary['succeeded_amount'] or 0
+    return summary
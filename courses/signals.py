@@ -0,0 +1,109 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.analytics import bump_payments_analytics_version
+from courses.cache import bump_course_version, invalidate_lessons_cache, invalidate_user_subscriptions
+from courses.models import Course, CourseStats, Lesson, Payments, Subscription
+from courses.search import invalidate_search_index
+from courses.stats import adjust_course_stats, rebuild_course_stats
+
+
+@receiver(post_save, sender=Course)
+def course_created(sender, instance, created, raw, **kwargs):
+    """Для нового курса создаём пустую статистику"""
+    if created and not raw:
+        CourseStats.objects.create(course=instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def searchable_changed(sender, **kwargs):
+    """Сбрасываем резервный поисковый индекс модели"""
+    invalidate_search_index(sender)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def lessons_changed(sender, **kwargs):
+    """Сбрасываем закэшированные ответы по урокам: они содержат
+    и название курса урока"""
+    invalidate_lessons_cache()
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, raw, **kwargs):
+    """При изменении урока обновляем версию содержимого курса и количество
+    уроков в нём, а при переносе урока в другой курс - и данные прежнего курса"""
+    old_course_pk = None if created else getattr(instance, '_loaded_course_id', instance.course_id)
+    if not raw and old_course_pk != instance.course_id:
+        adjust_course_stats(old_course_pk, lesson_count=-1)
+        adjust_course_stats(instance.course_id, lesson_count=1)
+
+    for course_pk in {old_course_pk, instance.course_id}:
+        if course_pk:
+            bump_course_version(course_pk)
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    """При удалении урока обновляем версию содержимого курса и количество уроков"""
+    if instance.course_id:
+        adjust_course_stats(instance.course_id, lesson_count=-1)
+        bump_course_version(instance.course_id)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        adjust_course_stats(instance.course_id, subscriber_count=1)
+        invalidate_user_subscriptions(instance.user_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    adjust_course_stats(instance.course_id, subscriber_count=-1)
+    invalidate_user_subscriptions(instance.user_id)
+
+
+@receiver(post_save, sender=Payments)
+def payment_saved(sender, instance, created, raw, **kwargs):
+    """Корректируем статистику курса на разницу между прежним и текущим
+    вкладом платежа. Если прежний вклад неизвестен (платёж загружен
+    не полностью), статистика курса пересчитывается. Закэшированные
+    отчёты по платежам сбрасываются после фиксации транзакции: новый платёж
+    текущего дня на отчёты за закрытые периоды не влияет"""
+    if raw:
+        return
+    if not created or instance.payment_date < date.today():
+        transaction.on_commit(bump_payments_analytics_version)
+    if created:
+        old = None
+    elif hasattr(instance, '_loaded_stats_contribution'):
+        old = instance._loaded_stats_contribution
+    else:
+        rebuild_course_stats([instance.course_id])
+        return
+
+    new = instance.stats_contribution
+    if old != new:
+        if old:
+            adjust_course_stats(old[0], payment_count=-1, revenue_total=-old[1])
+        if new:
+            adjust_course_stats(new[0], payment_count=1, revenue_total=new[1])
+    instance._loaded_stats_contribution = new
+
+
+@receiver(post_delete, sender=Payments)
+def payment_deleted(sender, instance, **kwargs):
+    contribution = instance.stats_contribution
+    if contribution:
+        adjust_course_stats(contribution[0], payment_count=-1, revenue_total=-contribution[1])
+    transaction.on_commit(bump_payments_analytics_version)
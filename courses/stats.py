@@ -0,0 +1,82 @@
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from courses.models import Course, CourseStats, Lesson, Payments, Subscription
+
+STATS_FIELDS = ('lesson_count', 'subscriber_count', 'payment_count', 'revenue_total')
+
+
+def adjust_course_stats(course_pk, **deltas) -> None:
+    """Функция изменяет счётчики статистики курса на заданные величины
+    одним UPDATE запросом"""
+    if course_pk:
+        adjust_courses_stats([course_pk], **deltas)
+
+
+def adjust_courses_stats(course_pks, **deltas) -> None:
+    """Функция изменяет счётчики статистики нескольких курсов на одни
+    и те же величины одним UPDATE запросом"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if course_pks and deltas:
+        CourseStats.objects.filter(course_id__in=course_pks).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def _aggregate_subquery(model, aggregate, **filters):
+    """Подзапрос, вычисляющий агрегат по объектам модели, связанным с курсом"""
+    subquery = model.objects.filter(course=OuterRef('pk'), **filters).order_by().values('course')
+    return Coalesce(Subquery(subquery.annotate(value=aggregate).values('value')), 0)
+
+
+def calculate_course_stats(course_pks=None):
+    """Функция вычисляет статистику курсов по исходным данным.
+    Учитываются только проведённые оплаты курса целиком"""
+    paid = {'status': Payments.STATUS_SUCCEEDED}
+    queryset = Course.objects.annotate(
+        lesson_count=_aggregate_subquery(Lesson, Count('pk')),
+        subscriber_count=_aggregate_subquery(Subscription, Count('pk')),
+        payment_count=_aggregate_subquery(Payments, Count('pk'), **paid),
+        revenue_total=_aggregate_subquery(Payments, Sum('amount'), **paid),
+    ).values('pk', *STATS_FIELDS).order_by('pk')
+    if course_pks is not None:
+        queryset = queryset.filter(pk__in=course_pks)
+    return queryset
+
+
+def rebuild_course_stats(course_pks=None, chunk_size=1000) -> int:
+    """Функция пересчитывает статистику заданных (по умолчанию всех) курсов
+    и сохраняет её пачками. Возвращает количество обработанных курсов"""
+    total = 0
+    batch = []
+    for row in calculate_course_stats(course_pks).iterator(chunk_size=chunk_size):
+        batch.append(CourseStats(course_id=row.pop('pk'), **row))
+        if len(batch) == chunk_size:
+            total += _save_stats(batch)
+            batch = []
+    if batch:
+        total += _save_stats(batch)
+    return total
+
+
+def _save_stats(batch) -> int:
+    CourseStats.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=['course'], update_fields=STATS_FIELDS
+    )
+    return len(batch)
+
+
+def check_course_stats(course_pks=None) -> list:
+    """Функция сравнивает сохранённую статистику с вычисленной по исходным
+    данным и возвращает список расхождений"""
+    stored = CourseStats.objects.all()
+    if course_pks is not None:
+        stored = stored.filter(course_id__in=course_pks)
+    stored = {row.pop('course_id'): row for row in stored.values('course_id', *STATS_FIELDS)}
+
+    mismatches = []
+    for row in calculate_course_stats(course_pks).iterator():
+        course_pk = row.pop('pk')
+        if stored.get(course_pk) != row:
+            mismatches.append({'course': course_pk, 'stored': stored.get(course_pk), 'actual': row})
+    return mismatches
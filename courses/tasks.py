@@ -1,17 +1,112 @@
+import stripe
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
 
 from config import settings
+from courses.models import Course, Subscription, Payments
+from courses.payment_clients import get_payment_client
+
+# Отметка о запланированной рассылке уведомлений об обновлении курса
+COURSE_NOTIFICATION_CACHE_KEY = 'course_notification:{}'
+# Отметка о выполненной рассылке (по токену запланированной рассылки)
+COURSE_NOTIFICATION_SENT_KEY = 'course_notification_sent:{}'
+
+# Временные ошибки STRIPE.COM, после которых платёж проводится повторно
+RETRYABLE_STRIPE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.RateLimitError,
+    stripe.error.APIError,
+)
+
+
+@shared_task
+def notify_course_subscribers(course_pk, course_title=None, token=None):
+    """Функция выбирает адреса подписчиков курса одним потоковым запросом
+    и разбивает их на пачки. Для каждой пачки запускается отдельная фоновая
+    задача рассылки. Запланированная рассылка (с токеном token) выполняется
+    один раз, даже если брокер доставил задачу повторно"""
+    # cache.add атомарно создаёт отметку о рассылке, повторный запуск
+    # с тем же токеном её не создаст и завершится без рассылки
+    if token is not None and not cache.add(
+            COURSE_NOTIFICATION_SENT_KEY.format(token), True, timeout=settings.COURSE_NOTIFICATION_WINDOW * 2):
+        return
+    # Снимаем отметку о запланированной рассылке: обновления курса после
+    # этого момента попадут уже в следующую рассылку
+    cache.delete(COURSE_NOTIFICATION_CACHE_KEY.format(course_pk))
+    if course_title is None:
+        course_title = Course.objects.filter(pk=course_pk).values_list('title', flat=True).first()
+        if course_title is None:
+            return
+
+    chunk_size = settings.COURSE_NOTIFICATION_CHUNK_SIZE
+    emails = Subscription.objects.filter(course_id=course_pk).values_list(
+        'user__email', flat=True
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for email in emails:
+        chunk.append(email)
+        if len(chunk) == chunk_size:
+            send_mail_about_update.delay(chunk, course_title)
+            chunk = []
+    if chunk:
+        send_mail_about_update.delay(chunk, course_title)
 
 
 @shared_task
-def send_mail_about_update(user_email, course_title):
+def send_mail_about_update(user_emails, course_title):
     """Функция для рассылки уведомлений об обновлении курса
-    подписанным на него пользователям"""
-    print(f'Материалы курса {course_title}, на который Вы подписаны, обновились!')
-    # send_mail(
-    #     subject=f'Обновление курса {course.title}',
-    #     message=f'Материалы курса {course.title}, на который Вы подписаны, обновились!',
-    #     recipient_list=[user_email],
-    #     from_email=settings.EMAIL_HOST_USER,
-    # )
+    подписанным на него пользователям. Все письма пачки отправляются
+    через одно SMTP соединение"""
+    # Поддерживаем задачи старого формата с одним адресом
+    if isinstance(user_emails, str):
+        user_emails = [user_emails]
+
+    messages = [
+        EmailMessage(
+            subject=f'Обновление курса {course_title}',
+            body=f'Материалы курса {course_title}, на который Вы подписаны, обновились!',
+            from_email=settings.EMAIL_HOST_USER,
+            to=[user_email],
+        )
+        for user_email in user_emails
+    ]
+    with get_connection() as connection:
+        connection.send_messages(messages)
+
+
+@shared_task(bind=True, max_retries=5)
+def process_payment(self, payment_pk):
+    """Фоновая задача проведения платежа через STRIPE.COM. Запросы
+    к API выполняются с ключами идемпотентности платежа, поэтому повторный
+    запуск задачи не приводит к повторному списанию. При временных ошибках
+    задача перезапускается с экспоненциально растущей задержкой"""
+    payment = Payments.objects.select_related('course').get(pk=payment_pk)
+    if payment.status != Payments.STATUS_PENDING:
+        return payment.status
+
+    client = get_payment_client()
+    key = payment.idempotency_key
+    try:
+        id_pay_method = client.create_payment_method(idempotency_key=f'{key}-method')
+        new_pay = client.create_payment_intent(
+            amount=payment.amount,
+            payment_method=id_pay_method,
+            description=f'Payment for learning course "{payment.course}"',
+            idempotency_key=f'{key}-intent'
+        )
+    except RETRYABLE_STRIPE_ERRORS as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=settings.PAYMENT_RETRY_BACKOFF * 2 ** self.request.retries)
+        new_pay = {'id': None, 'status': 'failed'}
+    except stripe.error.StripeError:
+        new_pay = {'id': None, 'status': 'failed'}
+
+    payment.stripe_payment_id = new_pay['id']
+    if new_pay['status'] == 'succeeded':
+        payment.status = Payments.STATUS_SUCCEEDED
+    else:
+        payment.status = Payments.STATUS_FAILED
+    payment.save(update_fields=['stripe_payment_id', 'status'])
+    return payment.status
@@ -1,9 +1,37 @@
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from io import StringIO, BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction, IntegrityError
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
+import stripe
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.serializers import ValidationError
 
-from courses.models import Lesson, Course, Subscription
+from config import settings
+from config.cache import CACHE_VERSION_KEY, bump_version, cached, versioned_key
+from courses.analytics import PAYMENTS_ANALYTICS_NAMESPACE
+from courses.cache import get_user_subscriptions
+from courses.management.commands.explain_queries import find_seq_scans
+from courses.importers import PaymentsImportSerializer, load_related
+from courses.models import Lesson, Course, Subscription, Payments, CourseStats
+from courses.payment_clients import FakeStripeClient
+from courses.serializers import PaymentsSerializer
+from courses.services import schedule_course_notification, subscribe, unsubscribe
+from courses.stats import check_course_stats, rebuild_course_stats
+from courses.tasks import notify_course_subscribers, send_mail_about_update, process_payment
+from monitoring.metrics import registry
 from users.models import User
 
 
@@ -137,9 +165,1022 @@ class LessonCRUDTestCase(APITestCase):
             {'subscribe': False}
         )
 
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         self.assertEqual(
             Subscription.objects.all().count(),
             0
         )
+
+
+class CourseNotificationTestCase(APITestCase):
+    """Класс для тестирования пакетной рассылки уведомлений
+    об обновлении курса"""
+
+    def setUp(self):
+        self.course = Course.objects.create(title='test', author=User.objects.create(email='author@test.com'))
+        for i in range(5):
+            user = User.objects.create(email=f'user{i}@test.com', password='test')
+            Subscription.objects.create(user=user, course=self.course)
+
+    def test_notify_course_subscribers_chunks(self):
+        """Адреса подписчиков разбиваются на пачки, на каждую пачку
+        ставится одна задача рассылки"""
+        with mock.patch('courses.tasks.settings.COURSE_NOTIFICATION_CHUNK_SIZE', 2), \
+                mock.patch.object(send_mail_about_update, 'delay') as delay, \
+                self.assertNumQueries(1):
+            notify_course_subscribers(self.course.pk, self.course.title)
+
+        chunks = [call.args[0] for call in delay.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(
+            sorted(email for chunk in chunks for email in chunk),
+            [f'user{i}@test.com' for i in range(5)]
+        )
+
+    def test_notification_sent_once(self):
+        """Повторно доставленная задача рассылки не рассылает уведомления снова"""
+        cache.clear()
+        with mock.patch.object(send_mail_about_update, 'delay') as delay:
+            notify_course_subscribers(self.course.pk, self.course.title, token='token')
+            notify_course_subscribers(self.course.pk, self.course.title, token='token')
+        delay.assert_called_once()
+
+    def test_updates_coalesced(self):
+        """Все обновления курса и его уроков в пределах окна приводят
+        к одной отложенной рассылке"""
+        cache.clear()
+        self.client.force_authenticate(user=self.course.author)
+        lessons = [Lesson.objects.create(title=f'lesson{i}', course=self.course, author=self.course.author)
+                   for i in range(3)]
+
+        with mock.patch.object(notify_course_subscribers, 'apply_async') as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('courses:courses-detail', args=[self.course.pk]), {'title': 'new'})
+            for lesson in lessons:
+                self.client.patch(reverse('courses:lessons_update', args=[lesson.pk]), {'title': 'new'})
+
+        apply_async.assert_called_once_with(
+            (self.course.pk,), {'token': mock.ANY}, countdown=settings.COURSE_NOTIFICATION_WINDOW
+        )
+
+        # После запуска рассылки следующее обновление планирует новую
+        with mock.patch.object(send_mail_about_update, 'delay'):
+            notify_course_subscribers(self.course.pk)
+        with mock.patch.object(notify_course_subscribers, 'apply_async') as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('courses:courses-detail', args=[self.course.pk]), {'title': 'newer'})
+        apply_async.assert_called_once()
+
+    def test_rolled_back_update_not_coalesced(self):
+        """Отменённое обновление курса не блокирует следующую рассылку"""
+        cache.clear()
+        with mock.patch.object(notify_course_subscribers, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        schedule_course_notification(self.course.pk)
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+            apply_async.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_course_notification(self.course.pk)
+        apply_async.assert_called_once()
+
+    def test_send_mail_about_update(self):
+        """Все письма пачки отправляются"""
+        send_mail_about_update(['a@test.com', 'b@test.com'], self.course.title)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['a@test.com'])
+
+
+class CourseDetailCacheTestCase(APITestCase):
+    """Класс для тестирования кэширования детальной информации о курсе"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test', author=self.user)
+        self.lesson = Lesson.objects.create(title='lesson', course=self.course, author=self.user)
+        self.url = reverse('courses:courses-detail', args=[self.course.pk])
+
+    def test_detail_cached(self):
+        """Повторный запрос не сериализует уроки заново, признак подписки
+        вычисляется для каждого пользователя"""
+        first = self.client.get(self.url).json()
+        self.assertFalse(first['is_subscribed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(user=self.user, course=self.course)
+        # Курс и заново загружаемый набор подписок пользователя
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url).json()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.assertTrue(second['is_subscribed'])
+        self.assertEqual(second['lessons_list'], first['lessons_list'])
+
+    def test_detail_invalidated_on_lesson_change(self):
+        """Изменение, добавление и удаление урока обновляют закэшированный ответ"""
+        self.client.get(self.url)
+
+        self.lesson.title = 'new_title'
+        self.lesson.save()
+        lessons = self.client.get(self.url).json()['lessons_list']
+        self.assertEqual([lesson['title'] for lesson in lessons], ['new_title'])
+
+        self.lesson.delete()
+        self.assertEqual(self.client.get(self.url).json()['lessons_list'], [])
+
+
+class QueryCountTestCase(APITestCase):
+    """Класс для проверки того, что количество запросов к БД на каждом
+    эндпоинте не зависит от количества возвращаемых объектов"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test', author=self.user)
+
+    def create_rows(self, count):
+        """Создаёт связанные объекты всех типов в заданном количестве"""
+        start = User.objects.count()
+        for i in range(start, start + count):
+            author = User.objects.create(email=f'author{i}@test.com', password='test')
+            course = Course.objects.create(title=f'course{i}', author=self.user)
+            lesson = Lesson.objects.create(title=f'lesson{i}', course=self.course, author=self.user)
+            Lesson.objects.create(title=f'lesson{i}', course=self.course, author=author)
+            Payments.objects.create(paid_by=author, course=course, amount=100, payment_way='cash')
+            Payments.objects.create(paid_by=author, lesson=lesson, amount=100, payment_way='cash')
+
+    def count_queries(self, url):
+        """Выполняет GET запрос с пустым кэшем и возвращает число запросов к БД"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+
+    def assertConstantQueries(self, url, expected):
+        """Количество запросов для одной и нескольких строк одинаково и равно expected"""
+        self.create_rows(1)
+        few = self.count_queries(url)
+        self.create_rows(2)
+        many = self.count_queries(url)
+
+        self.assertEqual(few, many)
+        self.assertEqual(many, expected)
+
+    def test_lessons_list(self):
+        self.assertConstantQueries(reverse('courses:lessons_list'), 3)
+
+    def test_lessons_detail(self):
+        lesson = Lesson.objects.create(title='test', course=self.course, author=self.user)
+        self.assertConstantQueries(reverse('courses:lessons_detail', args=[lesson.pk]), 2)
+
+    def test_courses_list(self):
+        self.assertConstantQueries(reverse('courses:courses-list'), 4)
+
+    def test_courses_detail(self):
+        self.assertConstantQueries(reverse('courses:courses-detail', args=[self.course.pk]), 4)
+
+    def test_payments_list(self):
+        self.assertConstantQueries(reverse('courses:payments-list'), 3)
+
+    def test_cursor_pagination(self):
+        """При пагинации по курсору общее количество объектов не подсчитывается"""
+        self.assertConstantQueries(reverse('courses:payments-list') + '?pagination=cursor', 2)
+
+
+@mock.patch('courses.payment_clients.settings.PAYMENT_CLIENT', 'courses.payment_clients.FakeStripeClient')
+class CoursePurchaseTestCase(APITestCase):
+    """Класс для тестирования асинхронного проведения платежей"""
+
+    def setUp(self):
+        FakeStripeClient.reset()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test')
+
+    def purchase(self):
+        """Оформляет покупку курса, возвращает id платежа"""
+        with mock.patch.object(process_payment, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('courses:course_purchase', args=[self.course.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()['status'], Payments.STATUS_PENDING)
+        delay.assert_called_once_with(response.json()['payment_id'])
+        return response.json()['payment_id']
+
+    def get_status(self, payment_id):
+        response = self.client.get(reverse('courses:payment_status', args=[payment_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()['status']
+
+    def test_purchase_succeeded(self):
+        """Платёж регистрируется в статусе "в обработке" и проводится задачей"""
+        payment_id = self.purchase()
+        self.assertEqual(self.get_status(payment_id), Payments.STATUS_PENDING)
+
+        process_payment(payment_id)
+        self.assertEqual(self.get_status(payment_id), Payments.STATUS_SUCCEEDED)
+
+        # Повторный запуск задачи не проводит платёж ещё раз
+        process_payment(payment_id)
+        self.assertEqual(len(FakeStripeClient.requests), 2)
+
+    def test_purchase_retried(self):
+        """При временной ошибке STRIPE.COM задача перезапускается"""
+        payment_id = self.purchase()
+        FakeStripeClient.errors = [stripe.error.APIConnectionError('timeout')]
+
+        process_payment.apply(args=(payment_id,))
+        self.assertEqual(self.get_status(payment_id), Payments.STATUS_SUCCEEDED)
+
+    def test_purchase_declined(self):
+        """Отклонённый платёж получает статус failed"""
+        payment_id = self.purchase()
+        FakeStripeClient.errors = [stripe.error.CardError('declined', None, 'card_declined')]
+
+        process_payment(payment_id)
+        self.assertEqual(self.get_status(payment_id), Payments.STATUS_FAILED)
+
+    def test_purchase_missing_course(self):
+        response = self.client.post(reverse('courses:course_purchase', args=[self.course.pk + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PaginationTestCase(APITestCase):
+    """Класс для тестирования выбора способа пагинации"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        for i in range(7):
+            Lesson.objects.create(title=f'lesson{i}', author=self.user)
+
+    def test_page_number_pagination(self):
+        response = self.client.get(reverse('courses:lessons_list'), {'page_size': 3})
+        self.assertEqual(response.json()['count'], 7)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_page_size_capped(self):
+        with mock.patch('courses.paginators.SimplePaginator.max_page_size', 2):
+            response = self.client.get(reverse('courses:lessons_list'), {'page_size': 50})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_cursor_pagination(self):
+        """Проход по всем страницам курсора возвращает все объекты без повторов"""
+        titles = []
+        url = reverse('courses:lessons_list') + '?pagination=cursor&page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            titles.extend(lesson['title'] for lesson in data['results'])
+            url = data['next']
+
+        self.assertEqual(titles, [f'lesson{i}' for i in reversed(range(7))])
+
+
+class CourseStatsTestCase(APITestCase):
+    """Класс для тестирования поддержания статистики курсов"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test', author=self.user)
+        self.other_course = Course.objects.create(title='other', author=self.user)
+
+    def get_stats(self, course):
+        return CourseStats.objects.values(
+            'lesson_count', 'subscriber_count', 'payment_count', 'revenue_total'
+        ).get(course=course)
+
+    def test_stats_maintained(self):
+        """Статистика обновляется при изменении уроков, подписок и платежей"""
+        lessons = [Lesson.objects.create(title=f'lesson{i}', course=self.course) for i in range(3)]
+        Subscription.objects.create(user=self.user, course=self.course)
+        Payments.objects.create(paid_by=self.user, course=self.course, amount=100, payment_way='cash')
+        pending = Payments.objects.create(paid_by=self.user, course=self.course, amount=50,
+                                          payment_way='transaction', status=Payments.STATUS_PENDING)
+        self.assertEqual(
+            self.get_stats(self.course),
+            {'lesson_count': 3, 'subscriber_count': 1, 'payment_count': 1, 'revenue_total': 100}
+        )
+
+        lessons[0].delete()
+        lesson = Lesson.objects.get(pk=lessons[1].pk)
+        lesson.course = self.other_course
+        lesson.save()
+        pending = Payments.objects.get(pk=pending.pk)
+        pending.status = Payments.STATUS_SUCCEEDED
+        pending.save()
+        Subscription.objects.all().delete()
+
+        self.assertEqual(
+            self.get_stats(self.course),
+            {'lesson_count': 1, 'subscriber_count': 0, 'payment_count': 2, 'revenue_total': 150}
+        )
+        self.assertEqual(self.get_stats(self.other_course)['lesson_count'], 1)
+        self.assertEqual(check_course_stats(), [])
+
+    def test_rebuild(self):
+        """Пересчёт исправляет расхождения в статистике"""
+        Lesson.objects.create(title='lesson', course=self.course)
+        CourseStats.objects.filter(course=self.course).update(lesson_count=10)
+        self.assertEqual(len(check_course_stats()), 1)
+
+        self.assertEqual(rebuild_course_stats(), 2)
+        self.assertEqual(check_course_stats(), [])
+
+    def test_list_reads_stats(self):
+        Lesson.objects.create(title='lesson', course=self.course)
+        response = self.client.get(reverse('courses:courses-list'))
+        self.assertEqual(
+            {course['title']: course['lesson_quantity'] for course in response.json()['results']},
+            {'test': 1, 'other': 0}
+        )
+
+
+class PaymentsAnalyticsTestCase(APITestCase):
+    """Класс для тестирования отчёта по платежам"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.user.groups.add(Group.objects.create(name='Moderator'))
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test')
+        self.lesson = Lesson.objects.create(title='lesson', course=self.course)
+
+        payments = [
+            (date(2023, 9, 1), self.course, None, 1000, 'cash'),
+            (date(2023, 9, 20), self.course, None, 2000, 'transaction'),
+            (date(2023, 10, 5), None, self.lesson, 500, 'cash'),
+        ]
+        for payment_date, course, lesson, amount, payment_way in payments:
+            payment = Payments.objects.create(paid_by=self.user, course=course, lesson=lesson,
+                                              amount=amount, payment_way=payment_way)
+            Payments.objects.filter(pk=payment.pk).update(payment_date=payment_date)
+        Payments.objects.create(paid_by=self.user, course=self.course, amount=9999,
+                                payment_way='transaction', status=Payments.STATUS_PENDING)
+
+    def get_report(self, **params):
+        response = self.client.get(reverse('courses:payments_analytics'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_group_by_month(self):
+        report = self.get_report(group_by='month')
+        self.assertEqual(
+            [(row['period'], row['revenue'], row['count']) for row in report['results']],
+            [('2023-09-01', 3000, 2), ('2023-10-01', 500, 1)]
+        )
+        self.assertEqual(report['total'], {'revenue': 3500, 'count': 3, 'average': 1166.67})
+
+    def test_group_by_course(self):
+        """Отчёт по курсам за всё время и за период совпадают"""
+        expected = [{'course': self.course.pk, 'title': 'test', 'revenue': 3000, 'count': 2, 'average': 1500.0}]
+        self.assertEqual(self.get_report(group_by='course')['results'], expected)
+        self.assertEqual(self.get_report(group_by='course', date_to='2023-12-31')['results'], expected)
+
+    def test_date_filters(self):
+        report = self.get_report(group_by='payment_way', date_from='2023-09-10', date_to='2023-10-31')
+        self.assertEqual(
+            [(row['payment_way'], row['revenue']) for row in report['results']],
+            [('cash', 500), ('transaction', 2000)]
+        )
+
+    def test_closed_period_cached(self):
+        self.get_report(group_by='day', date_to='2023-12-31')
+        with self.assertNumQueries(0):
+            self.get_report(group_by='day', date_to='2023-12-31')
+
+    def test_closed_period_invalidated(self):
+        """Платёж задним числом сбрасывает закэшированный отчёт"""
+        self.assertEqual(self.get_report(group_by='day', date_to='2023-12-31')['total']['revenue'], 3500)
+        with self.captureOnCommitCallbacks(execute=True):
+            Payments.objects.create(paid_by=self.user, course=self.course, amount=100,
+                                    payment_way='cash', payment_date=date(2023, 9, 2))
+        self.assertEqual(self.get_report(group_by='day', date_to='2023-12-31')['total']['revenue'], 3600)
+
+    def test_lost_version_invalidates(self):
+        """Потеря версии отчётов в кэше не возвращает закэшированные ранее отчёты"""
+        self.assertEqual(self.get_report(group_by='day', date_to='2023-12-31')['total']['revenue'], 3500)
+        cache.delete(CACHE_VERSION_KEY.format(PAYMENTS_ANALYTICS_NAMESPACE))
+        Payments.objects.filter(amount=500).update(amount=600)
+        self.assertEqual(self.get_report(group_by='day', date_to='2023-12-31')['total']['revenue'], 3600)
+
+    def test_payment_date_read_only(self):
+        """Дату платежа задаёт только массовая загрузка"""
+        data = {'course': self.course.pk, 'amount': 100, 'payment_way': 'cash', 'payment_date': '2023-09-02'}
+        serializer = PaymentsSerializer(data={**data, 'paid_by': 'user'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertNotIn('payment_date', serializer.validated_data)
+
+        row = {**data, 'paid_by': self.user.pk}
+        serializer = PaymentsImportSerializer(data=row, context={'related': load_related(PaymentsImportSerializer, [row])})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['payment_date'], date(2023, 9, 2))
+
+    def test_moderators_only(self):
+        self.user.groups.clear()
+        response = self.client.get(reverse('courses:payments_analytics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PaymentsExportTestCase(APITestCase):
+    """Класс для тестирования потоковой выгрузки платежей"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.user.groups.add(Group.objects.create(name='Moderator'))
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test')
+        for amount, payment_way in ((100, 'cash'), (200, 'transaction'), (300, 'cash')):
+            Payments.objects.create(paid_by=self.user, course=self.course, amount=amount, payment_way=payment_way)
+
+    def export(self, **params):
+        response = self.client.get(reverse('courses:payments_export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_csv_export(self):
+        lines = self.export(payment_way='cash')
+        self.assertEqual(lines[0], 'id,paid_by,payment_date,course,lesson,amount,payment_way,status')
+        self.assertEqual([line.split(',')[5] for line in lines[1:]], ['100', '300'])
+
+    def test_ndjson_export(self):
+        lines = self.export(export_format='ndjson')
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['amount'] for row in rows], [100, 200, 300])
+        self.assertEqual(rows[0]['paid_by'], 'user@test.com')
+
+    def test_export_command(self):
+        output = StringIO()
+        call_command('export_payments', '--format', 'ndjson', '--payment-way', 'transaction', stdout=output)
+        self.assertEqual([json.loads(line)['amount'] for line in output.getvalue().splitlines()], [200])
+
+
+class BulkImportTestCase(APITestCase):
+    """Класс для тестирования массовой загрузки данных"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='admin@test.com', password='test', is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test')
+
+    def upload(self, kind, content, name):
+        upload = BytesIO(content.encode())
+        upload.name = name
+        response = self.client.post(reverse('courses:bulk_import', args=[kind]), {'file': upload},
+                                    format='multipart')
+        return response
+
+    def test_import_lessons_csv(self):
+        """Корректные строки сохраняются, для некорректных возвращаются ошибки"""
+        content = (
+            'title,description,link,course,author\n'
+            f'first,desc,https://youtube.com/1,{self.course.pk},{self.user.pk}\n'
+            f'second,,,{self.course.pk},\n'
+            'third,,https://anyurl.com/1,,\n'
+            'fourth,,,100500,\n'
+        )
+        with self.assertNumQueries(7):
+            response = self.upload('lessons', content, 'lessons.csv')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        report = response.json()
+        self.assertEqual((report['total'], report['created'], report['failed']), (4, 2, 2))
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4])
+        self.assertIn('link', report['errors'][0]['errors'])
+        self.assertIn('course', report['errors'][1]['errors'])
+        self.assertEqual(CourseStats.objects.get(course=self.course).lesson_count, 2)
+
+    def test_import_payments_command(self):
+        """Загрузка платежей из NDJSON пачками с сохранением даты оплаты"""
+        rows = [
+            {'paid_by': self.user.pk, 'course': self.course.pk, 'amount': 100,
+             'payment_way': 'cash', 'payment_date': f'2023-09-{day:02}'}
+            for day in range(1, 6)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'payments.ndjson')
+            with open(path, 'w') as file:
+                file.writelines(json.dumps(row) + '\n' for row in rows)
+            call_command('import_data', 'payments', path, '--chunk-size', '2', stdout=StringIO())
+
+        self.assertEqual(
+            list(Payments.objects.order_by('payment_date').values_list('payment_date', flat=True)),
+            [date(2023, 9, day) for day in range(1, 6)]
+        )
+        self.assertEqual(CourseStats.objects.get(course=self.course).revenue_total, 500)
+
+    def test_import_requires_staff(self):
+        self.user.is_staff = False
+        self.user.save()
+        response = self.upload('courses', '[]', 'courses.json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LessonBatchTestCase(APITestCase):
+    """Класс для тестирования пакетного изменения уроков"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='test', author=self.user)
+        self.lessons = [
+            Lesson.objects.create(title=f'lesson{i}', course=self.course, author=self.user)
+            for i in range(3)
+        ]
+        Course.objects.filter(pk=self.course.pk).update(updated_at=date(2023, 1, 1))
+        Subscription.objects.create(user=self.user, course=self.course)
+
+    def post(self, operations):
+        return self.client.post(reverse('courses:lessons_batch'), {'operations': operations}, format='json')
+
+    def test_batch(self):
+        """Операции применяются вместе, уведомление отправляется один раз на курс"""
+        cache.clear()
+        with mock.patch.object(notify_course_subscribers, 'apply_async') as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                {'action': 'create', 'data': {'title': 'new', 'course': self.course.pk}},
+                {'action': 'update', 'id': self.lessons[0].pk, 'data': {'title': 'renamed'}},
+                {'action': 'update', 'id': self.lessons[1].pk, 'data': {'description': 'desc'}},
+                {'action': 'delete', 'id': self.lessons[2].pk},
+            ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['created']), 1)
+        self.assertEqual(response.json()['deleted'], [self.lessons[2].pk])
+        self.assertEqual(
+            sorted(Lesson.objects.values_list('title', flat=True)),
+            ['lesson1', 'new', 'renamed']
+        )
+        apply_async.assert_called_once_with(
+            (self.course.pk,), {'token': mock.ANY}, countdown=settings.COURSE_NOTIFICATION_WINDOW
+        )
+        self.assertEqual(CourseStats.objects.get(course=self.course).lesson_count, 3)
+
+    def test_batch_rolled_back_on_error(self):
+        """При ошибке в любой операции изменения не применяются"""
+        response = self.post([
+            {'action': 'update', 'id': self.lessons[0].pk, 'data': {'title': 'renamed'}},
+            {'action': 'update', 'id': self.lessons[1].pk, 'data': {'link': 'https://anyurl.com'}},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('1', response.json()['errors'])
+        self.assertFalse(Lesson.objects.filter(title='renamed').exists())
+
+    def test_batch_permissions(self):
+        """Нельзя изменять чужие уроки"""
+        other = Lesson.objects.create(title='other', author=User.objects.create(email='other@test.com'))
+        response = self.post([
+            {'action': 'update', 'id': self.lessons[0].pk, 'data': {'title': 'renamed'}},
+            {'action': 'delete', 'id': other.pk},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Lesson.objects.filter(pk=other.pk).exists())
+
+
+class SearchTestCase(APITestCase):
+    """Класс для тестирования полнотекстового поиска курсов и уроков"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.other_user = User.objects.create(email='other@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+
+        self.python = Course.objects.create(title='Python', description='Основы программирования', author=self.user)
+        self.django = Course.objects.create(title='Django', description='Веб программирование на Python',
+                                            author=self.user)
+        Course.objects.create(title='Python для всех', author=self.other_user)
+        Lesson.objects.create(title='Функции', description='Аргументы функций', author=self.user)
+
+    def test_search_endpoint(self):
+        """Поиск по префиксам слов, упорядоченный по релевантности, только среди своих курсов"""
+        response = self.client.get(reverse('courses:search'), {'q': 'pyth'})
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [self.python.pk, self.django.pk])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<b>Python</b>', results[1]['snippet'])
+
+    def test_search_all_terms(self):
+        response = self.client.get(reverse('courses:search'), {'q': 'python веб'})
+        self.assertEqual([result['id'] for result in response.json()['results']], [self.django.pk])
+
+    def test_search_lessons(self):
+        response = self.client.get(reverse('courses:search'), {'q': 'функц', 'type': 'lessons'})
+        self.assertEqual([result['title'] for result in response.json()['results']], ['Функции'])
+
+    def test_list_search_filter(self):
+        """Параметр search фильтрует список курсов, изменения учитываются сразу"""
+        self.django.title = 'Flask'
+        self.django.description = None
+        self.django.save()
+        response = self.client.get(reverse('courses:courses-list'), {'search': 'python'})
+        self.assertEqual([course['title'] for course in response.json()['results']], ['Python'])
+        self.assertNotIn('search_vector', response.json()['results'][0])
+
+
+class QueryPlanTestCase(APITestCase):
+    """Класс для тестирования индексов основных запросов"""
+
+    def setUp(self):
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.course = Course.objects.create(title='test', author=self.user)
+        Lesson.objects.create(title='test', course=self.course, author=self.user)
+
+    def test_subscription_unique(self):
+        Subscription.objects.create(user=self.user, course=self.course)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Subscription.objects.create(user=self.user, course=self.course)
+
+    def test_explain_queries(self):
+        """Запросы эндпоинтов используют индексы"""
+        out = StringIO()
+        call_command('explain_queries', '--fail-on-seq-scan', stdout=out)
+        self.assertIn('Запросов с полным просмотром таблиц: 0', out.getvalue())
+
+    def test_find_seq_scans(self):
+        self.assertEqual(find_seq_scans('2 0 0 SCAN courses_lesson\n5 0 0 SEARCH users_user USING INDEX x'),
+                         ['courses_lesson'])
+
+
+class SubscriptionServiceTestCase(APITestCase):
+    """Класс для тестирования оформления и отмены подписок одним запросом"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.courses = [Course.objects.create(title=f'course{i}') for i in range(3)]
+
+    def test_toggle_idempotent(self):
+        url = reverse('courses:course_subscribe', args=[self.courses[0].pk])
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'subscribe': True})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Подписка оформляется одним запросом, ещё один получает список подписок
+        self.assertEqual(len([query for query in queries if 'courses_subscription' in query['sql']]), 2)
+        self.assertEqual(response.json()['subscriptions'], [self.courses[0].pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'subscribe': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Subscription.objects.count(), 1)
+        self.assertEqual(CourseStats.objects.get(course=self.courses[0]).subscriber_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'subscribe': False})
+        response = self.client.post(url, {'subscribe': False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['subscriptions'], [])
+        self.assertEqual(CourseStats.objects.get(course=self.courses[0]).subscriber_count, 0)
+
+    def test_missing_course(self):
+        for subscribe in (True, False):
+            response = self.client.post(reverse('courses:course_subscribe', args=[self.courses[-1].pk + 1]), {'subscribe': subscribe})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch(self):
+        pks = [course.pk for course in self.courses]
+        Subscription.objects.create(user=self.user, course=self.courses[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('courses:course_batch_subscribe'),
+                                        {'courses': pks + [pks[-1] + 1], 'subscribe': True}, format='json')
+        self.assertEqual(response.json(), {'changed': pks[1:], 'subscriptions': pks})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('courses:course_batch_subscribe'),
+                                        {'courses': pks[:2], 'subscribe': False}, format='json')
+        self.assertEqual(response.json(), {'changed': pks[:2], 'subscriptions': pks[2:]})
+        self.assertEqual(check_course_stats(), [])
+
+    def test_batch_queries_constant(self):
+        """Число запросов подписки не зависит от числа курсов"""
+        courses = self.courses + [Course.objects.create(title=f'extra{i}') for i in range(17)]
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.user.pk, [courses[0].pk])
+        with self.assertNumQueries(len(queries)), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(len(subscribe(self.user.pk, [course.pk for course in courses[1:]])), 19)
+        with self.assertNumQueries(len(queries)), self.captureOnCommitCallbacks(execute=True):
+            unsubscribe(self.user.pk, [course.pk for course in courses])
+        self.assertEqual(check_course_stats(), [])
+
+
+class UserSubscriptionsCacheTestCase(APITestCase):
+    """Класс для тестирования кэширования набора подписок пользователя"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.courses = [Course.objects.create(title=f'course{i}', author=self.user) for i in range(3)]
+        Subscription.objects.create(user=self.user, course=self.courses[0])
+
+    def test_list_flags_and_filter(self):
+        """Признак подписки для страницы курсов и фильтр subscribed
+        вычисляются по одному набору из кэша"""
+        url = reverse('courses:courses-list')
+        response = self.client.get(url)
+        self.assertEqual([course['is_subscribed'] for course in response.json()['results']], [True, False, False])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('courses:course_subscribe', args=[self.courses[2].pk]), {'subscribe': True})
+        response = self.client.get(url)
+        self.assertEqual([course['is_subscribed'] for course in response.json()['results']], [True, False, True])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'subscribed': 'true'})
+        self.assertEqual([course['title'] for course in response.json()['results']], ['course0', 'course2'])
+        self.assertFalse([query for query in queries if 'courses_subscription' in query['sql']])
+
+    def test_rebuilt_on_miss(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(course=self.courses[0]).delete()
+        self.assertEqual(get_user_subscriptions(self.user.pk), frozenset())
+
+        cache.clear()
+        Subscription.objects.create(user=self.user, course=self.courses[1])
+        self.assertEqual(get_user_subscriptions(self.user.pk), {self.courses[1].pk})
+
+
+class CacheUtilitiesTestCase(APITestCase):
+    """Класс для тестирования вспомогательных функций кэширования
+    и кэширования ответов по урокам"""
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(title='lesson', author=self.user)
+
+    def test_versioned_key(self):
+        """Увеличение версии меняет все ключи пространства имён"""
+        key = versioned_key('test', 'a')
+        self.assertEqual(versioned_key('test', 'a'), key)
+        bump_version('test')
+        self.assertNotEqual(versioned_key('test', 'a'), key)
+
+    def test_cached_counts_hits_and_misses(self):
+        compute = mock.Mock(return_value=[1])
+        self.assertEqual(cached('test', compute, name='test'), [1])
+        self.assertEqual(cached('test', compute, name='test'), [1])
+        compute.assert_called_once()
+
+        metrics = registry.render()
+        self.assertIn('lms_cache_requests_total{cache="test",result="hit"} 1', metrics)
+        self.assertIn('lms_cache_requests_total{cache="test",result="miss"} 1', metrics)
+
+    def test_single_flight(self):
+        """Пока значение вычисляется другим процессом (блокировка занята),
+        его результат ожидается, а не вычисляется повторно"""
+        cache.add('cache_lock:test', True)
+        compute = mock.Mock(return_value='own')
+        with mock.patch('config.cache.time.sleep', side_effect=lambda _: cache.set('test', 'shared')):
+            self.assertEqual(cached('test', compute), 'shared')
+        compute.assert_not_called()
+
+        # Значение не появилось за время ожидания - вычисляем его сами
+        with mock.patch.object(settings, 'CACHE_LOCK_WAIT', 0):
+            self.assertEqual(cached('other', compute), 'own')
+
+    def test_lock_released_without_value(self):
+        """Если другой процесс снял блокировку, не сохранив значение
+        (страница списка уроков не найдена, 404), ожидание прекращается сразу"""
+        add = cache.add
+
+        def lock_taken(key, *args, **kwargs):
+            # Блокировку пересчёта получил другой процесс и уже снял её
+            return False if key.startswith('cache_lock:') else add(key, *args, **kwargs)
+
+        with mock.patch.object(cache, 'add', side_effect=lock_taken), \
+                mock.patch('config.cache.time.sleep') as sleep:
+            response = self.client.get(reverse('courses:lessons_list'), {'page': 99})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        sleep.assert_called_once()
+
+    def test_lessons_response_cached(self):
+        """Повторный запрос списка уроков не обращается к БД, изменение
+        урока сбрасывает закэшированные ответы"""
+        url = reverse('courses:lessons_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['count'], 1)
+
+        Lesson.objects.create(title='new', author=self.user)
+        self.assertEqual(self.client.get(url).json()['count'], 2)
+
+        other = User.objects.create(email='other@test.com', password='test')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).json()['count'], 0)
+
+        response = self.client.get(reverse('courses:lessons_detail', args=[self.lesson.pk]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConditionalRequestTestCase(APITestCase):
+    """Класс для тестирования условных запросов (ETag, Last-Modified)
+    к курсам и урокам"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='course', author=self.user)
+        self.lesson = Lesson.objects.create(title='lesson', course=self.course, author=self.user)
+        self.course_url = reverse('courses:courses-detail', args=[self.course.pk])
+        self.lesson_url = reverse('courses:lessons_detail', args=[self.lesson.pk])
+
+    def test_course_not_modified(self):
+        """Актуальная копия курса не передаётся повторно, новый урок
+        и подписка меняют ETag"""
+        response = self.client.get(self.course_url)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(self.course_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        Lesson.objects.create(title='new', course=self.course, author=self.user)
+        response = self.client.get(self.course_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['lessons_list']), 2)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('courses:course_subscribe', args=[self.course.pk]), {'subscribe': True})
+        response = self.client.get(self.course_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['is_subscribed'])
+
+    def test_course_if_modified_since(self):
+        """If-Modified-Since не скрывает изменение подписки пользователя"""
+        self.client.get(self.course_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('courses:course_subscribe', args=[self.course.pk]), {'subscribe': True})
+        response = self.client.get(self.course_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['is_subscribed'])
+
+    def test_lesson_not_modified(self):
+        """Актуальная копия урока не передаётся повторно, изменение урока
+        или названия его курса меняет ETag"""
+        etag = self.client.get(self.lesson_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.lesson_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.course.title = 'renamed'
+        self.course.save()
+        response = self.client.get(self.lesson_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['course'], 'renamed')
+
+    def test_lesson_fields_change_etag(self):
+        """Копия полного ответа не считается актуальной для ответа
+        с ограниченным составом полей"""
+        etag = self.client.get(self.lesson_url)['ETag']
+        response = self.client.get(self.lesson_url, {'fields': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'title': 'lesson'})
+
+    def test_lesson_delete_touches_course(self):
+        """Удаление урока обновляет время обновления курса"""
+        updated_at = self.course.updated_at
+        response = self.client.delete(reverse('courses:lessons_delete', args=[self.lesson.pk]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.course.refresh_from_db()
+        self.assertGreater(self.course.updated_at, updated_at)
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """Класс для тестирования параметров fields и expand"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(title='course', description='text', author=self.user)
+        self.lesson = Lesson.objects.create(title='lesson', description='text', course=self.course, author=self.user)
+        Payments.objects.create(paid_by=self.user, course=self.course, amount=100, payment_way='cash')
+
+    def test_course_detail_fields(self):
+        """Уроки курса не загружаются, если их список не запрошен"""
+        url = reverse('courses:courses-detail', args=[self.course.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'title,is_subscribed'})
+        self.assertEqual(response.json(), {'title': 'course', 'is_subscribed': False})
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "courses_lesson"')])
+
+        response = self.client.get(url, {'fields': 'title,lessons_list'})
+        self.assertEqual(response.json()['lessons_list'][0]['title'], 'lesson')
+
+    def test_courses_list_fields_and_expand(self):
+        """Список курсов: поля, не вошедшие в ответ, не загружаются из БД,
+        число запросов с раскрытым автором не зависит от числа курсов"""
+        url = reverse('courses:courses-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id'})
+        self.assertEqual(response.json()['results'], [{'id': self.course.pk}])
+        self.assertFalse([query for query in queries if '"description"' in query['sql']])
+
+        self.client.get(url, {'expand': 'author'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'expand': 'author'})
+        for i in range(4):
+            Course.objects.create(title=f'course {i}', author=self.user)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url, {'expand': 'author'})
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertEqual(response.json()['results'][0]['author'], {'id': self.user.pk, 'email': 'user@test.com'})
+
+    def test_course_detail_fields_query(self):
+        """Детальная информация о курсе загружается одним запросом
+        только с запрошенными полями"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('courses:courses-detail', args=[self.course.pk]), {'fields': 'title'})
+        self.assertEqual(response.json(), {'title': 'course'})
+        queries = [query['sql'] for query in queries if 'FROM "courses_course"' in query['sql']]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0])
+
+    def test_lessons_list_fields_and_expand(self):
+        """Поля, не вошедшие в ответ, не загружаются из БД, раскрываемый
+        курс загружается тем же запросом"""
+        url = reverse('courses:lessons_list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,title'})
+        self.assertEqual(response.json()['results'], [{'id': self.lesson.pk, 'title': 'lesson'}])
+        self.assertFalse([query for query in queries if '"description"' in query['sql']])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'expand': 'course'})
+        self.assertEqual(response.json()['results'][0]['course'], {'id': self.course.pk, 'title': 'course'})
+
+    def test_payments_expand(self):
+        response = self.client.get(reverse('courses:payments-list'), {'fields': 'amount,course', 'expand': 'course'})
+        self.assertEqual(response.json()['results'], [{'amount': 100, 'course': {'id': self.course.pk, 'title': 'course'}}])
+
+    def test_user_fields(self):
+        """Сводка по платежам вычисляется, только если она запрошена"""
+        url = reverse('users:user-detail', args=[self.user.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['payments_summary']['count'], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'email'})
+        self.assertEqual(response.json(), {'email': 'user@test.com'})
+        self.assertFalse([query for query in queries if 'courses_payments' in query['sql']])
+
+
+class BenchmarkTestCase(APITestCase):
+    """Класс для тестирования генератора данных и нагрузочных сценариев"""
+
+    def test_generate_and_run(self):
+        out = StringIO()
+        call_command('generate_data', '--users', 20, '--courses', 4, '--lessons-per-course', 3,
+                     '--subscriptions-per-user', 2, '--payments', 50, stdout=out)
+        self.assertEqual(Course.objects.count(), 4)
+        self.assertEqual(check_course_stats(), [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('run_benchmarks', '--requests', 3, '--warmup', 0, '--output', path, stdout=out)
+            with open(path, encoding='utf-8') as results_file:
+                results = json.load(results_file)
+            for name, result in results['scenarios'].items():
+                self.assertEqual(result['statuses'], {'200': 3}, name)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+            call_command('run_benchmarks', '--requests', 3, '--warmup', 0, '--compare', path,
+                         '--threshold', 10000, '--scenario', 'courses_list', stdout=out)
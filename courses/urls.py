@@ -3,7 +3,9 @@ from rest_framework.routers import DefaultRouter
 
 from courses.apps import CoursesConfig
 from courses.views import CourseViewSet, LessonListAPIView, LessonCreateAPIView, \
-    LessonDeleteAPIView, LessonUpdateAPIView, LessonDetailAPIView, PaymentsViewSet, MakeSubscription, CoursePurchase
+    LessonDeleteAPIView, LessonUpdateAPIView, LessonDetailAPIView, PaymentsViewSet, MakeSubscription, CoursePurchase, \
+    PaymentStatusAPIView, PaymentsAnalyticsAPIView, PaymentsExportAPIView, BulkImportAPIView, \
+    LessonBatchAPIView, SearchAPIView, BatchSubscription
 
 app_name = CoursesConfig.name
 
@@ -17,7 +19,15 @@ urlpatterns = [
     path('lessons_create/', LessonCreateAPIView.as_view(), name='lessons_create'),
     path('lessons_update/<int:pk>/', LessonUpdateAPIView.as_view(), name='lessons_update'),
     path('lessons_delete/<int:pk>/', LessonDeleteAPIView.as_view(), name='lessons_delete'),
+    path('lessons_batch/', LessonBatchAPIView.as_view(), name='lessons_batch'),
 
+    path('search/', SearchAPIView.as_view(), name='search'),
+    path('import/<str:kind>/', BulkImportAPIView.as_view(), name='bulk_import'),
+
+    path('courses/subscribe/', BatchSubscription.as_view(), name='course_batch_subscribe'),
     path('courses/<int:pk>/subscribe/', MakeSubscription.as_view(), name='course_subscribe'),
     path('courses/<int:pk>/buy/', CoursePurchase.as_view(), name='course_purchase'),
+    path('payments/analytics/', PaymentsAnalyticsAPIView.as_view(), name='payments_analytics'),
+    path('payments/export/', PaymentsExportAPIView.as_view(), name='payments_export'),
+    path('payments/<int:pk>/status/', PaymentStatusAPIView.as_view(), name='payment_status'),
 ] + router.urls
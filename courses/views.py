@@ -1,76 +1,181 @@
-from datetime import datetime, timezone
-
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, generics, status
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from courses.models import Lesson, Course, Payments, Subscription
-from courses.paginators import SimplePaginator
+from courses.analytics import payments_analytics
+from config.cache import CachedResponseMixin, conditional_response
+from config.fieldsets import SparseFieldsetViewMixin, is_sparse, FIELDS_PARAM, EXPAND_PARAM
+from courses.cache import get_course_detail, get_request_subscriptions, LESSONS_CACHE_NAMESPACE, course_detail_key
+from courses.exports import PAYMENTS_FILTER_FIELDS, EXPORT_FORMATS, export_payments
+from courses.importers import IMPORT_FORMATS, IMPORTERS, import_rows, read_rows, \
+    LessonImportSerializer, load_related
+from courses.models import Lesson, Course, Payments
+from courses.paginators import FlexiblePaginator, SimplePaginator
+from courses.search import FullTextSearchFilter, search
 from courses.serializers import LessonSerializer, CourseListSerializer, \
     CourseDetailSerializer, PaymentsSerializer, CourseDefaultSerializer, \
-    LessonDetailSerializer, CourseSubscribeSerializer
-from courses.services import check_subscription, make_payment
-from users.permissions import IsModeratorOrOwner
+    LessonDetailSerializer, CourseSubscribeSerializer, CourseBatchSubscribeSerializer, PaymentStatusSerializer, \
+    PaymentsAnalyticsQuerySerializer, LessonBatchSerializer, SearchQuerySerializer, SearchResultSerializer
+from courses.services import make_payment, schedule_course_notification, touch_courses, subscribe, \
+    unsubscribe, get_subscribed_course_pks
+from users.permissions import IsModeratorOrOwner, IsModerator
+from users.services import is_moderator
+
 
+# Уроки курса с данными, необходимыми LessonDetailSerializer
+COURSE_LESSONS_PREFETCH = Prefetch(
+    'lesson_set',
+    queryset=Lesson.objects.select_related('author').only(
+        'title', 'description', 'link', 'course', 'author__email'
+    ).order_by('pk')
+)
 
-class CourseViewSet(viewsets.ModelViewSet):
+
+class CourseViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     default_serializer = CourseDefaultSerializer
-    queryset = Course.objects.annotate(lesson_quantity=Count("lesson"))
+    queryset = Course.objects.defer('preview', 'search_vector')
     permission_classes = [IsModeratorOrOwner]
-    pagination_class = SimplePaginator
+    pagination_class = FlexiblePaginator
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    # Время обновления курса входит в ключ кэша и ETag
+    fieldset_required_fields = ('updated_at',)
 
     serializers = {
         'list': CourseListSerializer,
         'retrieve': CourseDetailSerializer
     }
 
+    querysets = {
+        'list': Course.objects.select_related('stats').defer('preview', 'search_vector').order_by('pk'),
+        'retrieve': Course.objects.select_related('author').only(
+            'title', 'description', 'updated_at', 'author__email'
+        ),
+    }
+
     def get_serializer_class(self):
         """Метод для определения используемого сериализатора в зависимости
         от вызванного метода"""
         return self.serializers.get(self.action, self.default_serializer)
 
+    def get_base_queryset(self):
+        """Метод для определения queryset в зависимости от вызванного метода,
+        поля ответа отбираются SparseFieldsetViewMixin.
+        Для пользователей, не входящих в группу Модераторов, список курсов
+        ограничивается объектами, созданными текущим пользователем.
+        Параметр subscribed=true оставляет в списке только курсы, на которые
+        подписан пользователь (по закэшированному набору подписок, без JOIN)"""
+        queryset = self.querysets.get(self.action, self.queryset).all()
+        if self.action == 'list':
+            if not is_moderator(self.request):
+                queryset = queryset.filter(author_id=self.request.user.pk)
+            if self.request.query_params.get('subscribed') in ('true', 'True', '1'):
+                queryset = queryset.filter(pk__in=get_request_subscriptions(self.request))
+        return queryset
+
     def perform_create(self, serializer):
         """Добавляем в поле author текущего пользователя при создании нового курса"""
-        serializer.save(author=self.request.user)
-
-    def list(self, request, *args, **kwargs):
-        """Для пользователей, не входящих в группу Модераторов отфильтрованный
-        queryset объектов, созданных текущим пользователем"""
-        if not self.request.user.groups.filter(name='Moderator').exists():
-            self.queryset = self.queryset.filter(author=self.request.user)
-        return super().list(request, *args, **kwargs)
+        serializer.save(author_id=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Не зависящая от пользователя часть ответа (курс и список уроков)
+        берётся из кэша, признак подписки текущего пользователя добавляется
+        при каждом запросе. ETag вычисляется по времени обновления курса,
+        версии списка его уроков и признаку подписки. Last-Modified не
+        передаётся: время изменения подписки пользователя неизвестно, и ответ
+        на If-Modified-Since мог бы вернуть устаревший признак подписки.
+        Если копия клиента актуальна, ответ не формируется (304)"""
+        course = self.get_object()
+        serializer = self.get_serializer(course)
+        is_subscribed = serializer.get_is_subscribed(course)
+
+        def build_data():
+            prefetch_related_objects([course], COURSE_LESSONS_PREFETCH)
+            data = dict(serializer.data)
+            data.pop('is_subscribed')
+            return data
+
+        def build():
+            return Response({**get_course_detail(course, build_data), 'is_subscribed': is_subscribed})
+
+        def build_sparse():
+            # Ответ с ограниченным составом полей не кэшируется,
+            # уроки загружаются, только если запрошен их список
+            if self.is_field_requested('lessons_list'):
+                prefetch_related_objects([course], COURSE_LESSONS_PREFETCH)
+            return Response(serializer.data)
+
+        sparse = is_sparse(request)
+        return conditional_response(
+            request, build_sparse if sparse else build,
+            etag=f'{course_detail_key(course)}:{is_subscribed}:'
+                 f'{request.query_params.get(FIELDS_PARAM)}:{request.query_params.get(EXPAND_PARAM)}',
+        )
 
     def perform_update(self, serializer):
-        """При обновлении данных курса запускаем функцию поиска подписок
-        на обновления этого курса в том случае, если с момента последнего
-        обновления прошло более 4 часов"""
-        time_delta = datetime.now(timezone.utc) - self.get_object().updated_at
+        """При обновлении данных курса планируем рассылку уведомлений
+        подписчикам. Обновления курса в пределах окна объединяются
+        в одну рассылку"""
         course = serializer.save()
-        if time_delta.seconds // 3600 > 4:
-            return check_subscription(course)
+        schedule_course_notification(course.pk)
+
+
+class LessonCacheMixin(CachedResponseMixin):
+    """Ответы по урокам кэшируются общими для всех Модераторов
+    и отдельно для каждого из остальных пользователей"""
+    cache_namespace = LESSONS_CACHE_NAMESPACE
+
+    def get_cache_scope(self, request) -> str:
+        return 'moderator' if is_moderator(request) else super().get_cache_scope(request)
 
 
-class LessonListAPIView(generics.ListAPIView):
+class LessonListAPIView(LessonCacheMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = LessonSerializer
-    queryset = Lesson.objects.all()
+    queryset = Lesson.objects.defer('preview', 'search_vector').order_by('pk')
     permission_classes = [IsModeratorOrOwner]
-    pagination_class = SimplePaginator
+    pagination_class = FlexiblePaginator
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
 
     def get_queryset(self):
         """Для пользователей, не входящих в группу Модераторов отфильтрованный
         queryset объектов, созданных текущим пользователем"""
         queryset = super().get_queryset()
-        if not self.request.user.groups.filter(name='Moderator').exists():
-            queryset = queryset.filter(author=self.request.user)
+        if not is_moderator(self.request):
+            queryset = queryset.filter(author_id=self.request.user.pk)
         return queryset
 
 
-class LessonDetailAPIView(generics.RetrieveAPIView):
+class LessonDetailAPIView(LessonCacheMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     serializer_class = LessonDetailSerializer
-    queryset = Lesson.objects.all()
+    queryset = Lesson.objects.select_related('author', 'course').only(
+        'title', 'description', 'link', 'updated_at', 'author__email', 'course__title', 'course__updated_at'
+    )
     permission_classes = [IsModeratorOrOwner]
+    # Время обновления урока входит в ETag
+    fieldset_required_fields = ('updated_at',)
+
+    def retrieve(self, request, *args, **kwargs):
+        """ETag и Last-Modified вычисляются по времени обновления урока
+        и его курса (ответ содержит название курса), ETag также зависит
+        от состава полей ответа (fields, expand). Если копия клиента
+        актуальна, ответ не формируется (304)"""
+        lesson = self.get_object()
+        updated = [lesson.updated_at] + ([lesson.course.updated_at] if lesson.course else [])
+
+        def handler(*args, **kwargs):
+            return Response(self.get_serializer(lesson).data)
+
+        return conditional_response(
+            request, lambda: self.cached_response(handler, request, *args, **kwargs),
+            etag=f'lesson:{lesson.pk}:' + ':'.join(str(value.timestamp()) for value in updated)
+                 + f':{request.query_params.get(FIELDS_PARAM)}:{request.query_params.get(EXPAND_PARAM)}',
+            last_modified=max(updated),
+        )
 
 
 class LessonCreateAPIView(generics.CreateAPIView):
@@ -80,7 +185,7 @@ class LessonCreateAPIView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         """Добавляем в поле author текущего пользователя при создании нового урока"""
-        serializer.save(author=self.request.user)
+        serializer.save(author_id=self.request.user.pk)
 
 
 class LessonUpdateAPIView(generics.UpdateAPIView):
@@ -89,21 +194,13 @@ class LessonUpdateAPIView(generics.UpdateAPIView):
     permission_classes = [IsModeratorOrOwner]
 
     def perform_update(self, serializer):
-        """При обновлении данных урока -> получаем курс, в состав которого входит
-        этот урок -> проверяем, прошло ли более 4 часов с момента крайнего обновления
-        курса -> запускаем функцию поиска подписок на обновления курса"""
-        course = self.get_object().course
+        """При обновлении данных урока обновляем поле updated_at связанного
+        с уроком курса (и прежнего курса при переносе урока) и планируем
+        рассылку уведомлений его подписчикам"""
+        old_course_pk = serializer.instance.course_id
+        lesson = serializer.save()
         # Урок может не иметь связи ни с одним курсом, выполняем проверку
-        if course:
-            time_delta = datetime.now(timezone.utc) - course.updated_at
-            # При обновлении урока обновляем поле updated_at
-            # связанного с уроком курса
-            course.updated_at = datetime.now(timezone.utc)
-            course.save()
-            if time_delta.seconds // 3600 > 4:
-                serializer.save()
-                return check_subscription(course)
-        serializer.save()
+        touch_courses({old_course_pk, lesson.course_id} - {None})
 
 
 class LessonDeleteAPIView(generics.DestroyAPIView):
@@ -111,14 +208,185 @@ class LessonDeleteAPIView(generics.DestroyAPIView):
     queryset = Lesson.objects.all()
     permission_classes = [IsModeratorOrOwner]
 
+    def perform_destroy(self, instance):
+        """При удалении урока обновляем поле updated_at курса и планируем
+        рассылку уведомлений его подписчикам"""
+        instance.delete()
+        if instance.course_id:
+            touch_courses({instance.course_id})
+
 
-class PaymentsViewSet(viewsets.ModelViewSet):
+class LessonBatchAPIView(generics.GenericAPIView):
+    """Класс используется для пакетного создания, изменения и удаления уроков.
+    Все операции выполняются в одной транзакции, время обновления курсов
+    и рассылка уведомлений выполняются один раз для каждого затронутого курса"""
+    serializer_class = LessonBatchSerializer
+
+    ACTION_METHODS = {'create': 'POST', 'update': 'PATCH', 'delete': 'DELETE'}
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+
+        # Все изменяемые и удаляемые уроки получаем одним запросом
+        lesson_pks = {operation['id'] for operation in operations if operation['action'] != 'create'}
+        lessons = Lesson.objects.in_bulk(lesson_pks)
+        missing = sorted(lesson_pks - lessons.keys())
+        if missing:
+            return Response({'message': f'Уроки не найдены: {missing}'}, status=status.HTTP_404_NOT_FOUND)
+        self.check_operations_permissions(request, operations, lessons)
+
+        context = {
+            'request': request,
+            'related': load_related(LessonImportSerializer, [operation['data'] for operation in operations]),
+        }
+        validated, errors = [], {}
+        for index, operation in enumerate(operations):
+            if operation['action'] == 'delete':
+                continue
+            lesson_serializer = LessonImportSerializer(
+                lessons.get(operation.get('id')), data=operation['data'],
+                partial=operation['action'] == 'update', context=context
+            )
+            if lesson_serializer.is_valid():
+                validated.append((operation['action'], lesson_serializer))
+            else:
+                errors[index] = lesson_serializer.errors
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = {'created': [], 'updated': [], 'deleted': []}
+        course_pks = set()
+        with transaction.atomic():
+            for action, lesson_serializer in validated:
+                if lesson_serializer.instance:
+                    course_pks.add(lesson_serializer.instance.course_id)
+                    lesson = lesson_serializer.save()
+                else:
+                    lesson = lesson_serializer.save(author_id=request.user.pk)
+                course_pks.add(lesson.course_id)
+                result['created' if action == 'create' else 'updated'].append(lesson.pk)
+
+            delete_pks = [operation['id'] for operation in operations if operation['action'] == 'delete']
+            course_pks.update(lessons[pk].course_id for pk in delete_pks)
+            Lesson.objects.filter(pk__in=delete_pks).delete()
+            result['deleted'] = sorted(set(delete_pks))
+
+            touch_courses(course_pks - {None})
+        return Response(result)
+
+    def check_operations_permissions(self, request, operations, lessons):
+        """Проверка прав на каждую операцию по правилам IsModeratorOrOwner"""
+        permission = IsModeratorOrOwner()
+        for operation in operations:
+            method = self.ACTION_METHODS[operation['action']]
+            lesson = lessons.get(operation.get('id'))
+            if not permission.has_method_permission(request, method) or \
+                    (lesson and not permission.has_method_object_permission(request, method, lesson)):
+                self.permission_denied(request, message=f'Недостаточно прав для операции {operation}')
+
+
+class SearchAPIView(generics.GenericAPIView):
+    """Класс используется для полнотекстового поиска курсов (?type=courses)
+    или уроков (?type=lessons) по названию и описанию. Результаты упорядочены
+    по релевантности и содержат фрагмент текста с выделенными совпадениями.
+    Пользователи, не входящие в группу Модераторов, ищут только среди
+    созданных ими объектов"""
+    serializer_class = SearchResultSerializer
+    pagination_class = SimplePaginator
+
+    models = {'courses': Course, 'lessons': Lesson}
+
+    def get(self, request, *args, **kwargs):
+        query_serializer = SearchQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        queryset = self.models[query_serializer.validated_data['type']].objects.only('title')
+        if not is_moderator(request):
+            queryset = queryset.filter(author_id=request.user.pk)
+
+        results = self.paginate_queryset(search(queryset, query_serializer.validated_data['q']))
+        return self.get_paginated_response(self.get_serializer(results, many=True).data)
+
+
+class PaymentsViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = PaymentsSerializer
-    queryset = Payments.objects.all()
+    queryset = Payments.objects.select_related('paid_by').only(
+        'payment_date', 'course', 'lesson', 'amount', 'payment_way',
+        'status', 'stripe_payment_id', 'paid_by__email'
+    )
     permission_classes = [IsModeratorOrOwner]
+    pagination_class = FlexiblePaginator
     filter_backends = [OrderingFilter, SearchFilter, DjangoFilterBackend]
     ordering_fields = ['payment_date']
-    filterset_fields = ['lesson', 'course', 'payment_way']
+    filterset_fields = PAYMENTS_FILTER_FIELDS
+
+
+class PaymentsExportAPIView(generics.GenericAPIView):
+    """Класс используется для потоковой выгрузки платежей в формате CSV
+    (по умолчанию) или NDJSON (?export_format=ndjson). Поддерживаются те же
+    фильтры, что и в PaymentsViewSet"""
+    queryset = Payments.objects.all()
+    permission_classes = [IsModerator]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = PAYMENTS_FILTER_FIELDS
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('export_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'export_format': [f'Допустимые значения: {", ".join(EXPORT_FORMATS)}']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(export_payments(queryset, file_format),
+                                         content_type=EXPORT_FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="payments.{file_format}"'
+        # Отключаем буферизацию ответа на прокси-сервере, чтобы строки
+        # уходили клиенту по мере формирования
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class PaymentsAnalyticsAPIView(generics.GenericAPIView):
+    """Класс используется для получения сводного отчёта по проведённым платежам:
+    выручка, количество и средний размер платежа по дням, неделям, месяцам,
+    курсам, урокам или способам оплаты. Все вычисления выполняются в БД"""
+    serializer_class = PaymentsAnalyticsQuerySerializer
+    permission_classes = [IsModerator]
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        report = payments_analytics(**serializer.validated_data)
+        return Response({**serializer.data, **report})
+
+
+class BulkImportAPIView(generics.GenericAPIView):
+    """Класс используется для массовой загрузки курсов, уроков или платежей
+    из файла CSV, NDJSON или JSON. В ответе возвращается отчёт с ошибками
+    по номерам строк"""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        kind = kwargs.get('kind')
+        upload = request.FILES.get('file')
+        file_format = request.data.get('file_format') or \
+            (upload.name.rsplit('.', 1)[-1].lower() if upload else None)
+        if kind not in IMPORTERS:
+            return Response({'message': f'Допустимые типы: {", ".join(IMPORTERS)}'},
+                            status=status.HTTP_404_NOT_FOUND)
+        if upload is None or file_format not in IMPORT_FORMATS:
+            return Response({'message': f'Передайте файл в одном из форматов: {", ".join(IMPORT_FORMATS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk_size = int(request.data.get('chunk_size') or 0) or None
+            report = import_rows(kind, read_rows(upload, file_format), chunk_size)
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
 
 
 class MakeSubscription(generics.CreateAPIView):
@@ -127,39 +395,70 @@ class MakeSubscription(generics.CreateAPIView):
     serializer_class = CourseSubscribeSerializer
 
     def post(self, request, *args, **kwargs):
-        """Переопределяем метод для вывода кастомного Response и создания
-        объекта Subscription"""
+        """Подписка оформляется или отменяется одним запросом к БД,
+        в ответе возвращается список курсов, на которые подписан пользователь"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        course_pk = kwargs.get('pk')
+
+        if serializer.validated_data['subscribe']:
+            changed = subscribe(request.user.pk, [course_pk])
+            subscriptions = get_subscribed_course_pks(request.user.pk, added=changed)
+            if changed:
+                message, status_code = 'Подписка на обновления курса оформлена!!', status.HTTP_201_CREATED
+            elif course_pk in subscriptions:
+                message, status_code = 'Вы уже подписаны на обновления этого курса!!', status.HTTP_200_OK
+            else:
+                raise Http404
+        else:
+            changed = unsubscribe(request.user.pk, [course_pk])
+            subscriptions = get_subscribed_course_pks(request.user.pk, removed=changed)
+            if changed:
+                message = 'Подписка на обновления курса отменена!!'
+            elif Course.objects.filter(pk=course_pk).exists():
+                message = 'Вы ещё не подписаны на обновления данного курса!!'
+            else:
+                raise Http404
+            status_code = status.HTTP_200_OK
 
-        data = {
-            'user': request.user,
-            'course': Course.objects.get(pk=kwargs.get('pk'))
-        }
+        return Response({'message': message, 'subscriptions': subscriptions}, status=status_code)
 
-        if request.data.get('subscribe') in (True, 'true', 'True'):
-            subs = Subscription.objects.filter(**data)
-            if subs:
-                return Response({'message': 'Вы уже подписаны на обновления этого курса!!'},
-                                status=status.HTTP_204_NO_CONTENT)
-            subs = Subscription.objects.create(**data)
-            subs.save()
-            return Response({'message': 'Подписка на обновления курса оформлена!!'},
-                            status=status.HTTP_201_CREATED)
+
+class BatchSubscription(generics.CreateAPIView):
+    """Класс используется для добавления/удаления подписок текущего
+    пользователя на несколько курсов одним запросом. Несуществующие курсы
+    пропускаются"""
+    serializer_class = CourseBatchSubscribeSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['subscribe']:
+            changed = subscribe(request.user.pk, serializer.validated_data['courses'])
+            subscriptions = get_subscribed_course_pks(request.user.pk, added=changed)
         else:
-            subs = Subscription.objects.filter(**data)
-            if subs:
-                subs.delete()
-                return Response({'message': 'Подписка на обновления курса отменена!!'},
-                                status=status.HTTP_204_NO_CONTENT)
-            return Response({'message': 'Вы ещё не подписаны на обновления данного курса!!'},
-                            status=status.HTTP_204_NO_CONTENT)
+            changed = unsubscribe(request.user.pk, serializer.validated_data['courses'])
+            subscriptions = get_subscribed_course_pks(request.user.pk, removed=changed)
+        return Response({'changed': changed, 'subscriptions': subscriptions})
 
 
 class CoursePurchase(generics.CreateAPIView):
     """Класс используется для оформления покупки на выбранный курс"""
 
     def post(self, request, *args, **kwargs):
-        """При отправке POST запроса выполняется запуск функции, отвечающей
-        за проведение оплаты за выбранный курс"""
-        make_payment(kwargs.get('pk'), request)
+        """При отправке POST запроса регистрируется платёж за выбранный курс,
+        сам платёж проводится в фоновой задаче. Клиент получает id платежа
+        для отслеживания его статуса"""
+        payment = make_payment(kwargs.get('pk'), request.user)
+        return Response({'payment_id': payment.pk, 'status': payment.status},
+                        status=status.HTTP_202_ACCEPTED)
+
+
+class PaymentStatusAPIView(generics.RetrieveAPIView):
+    """Класс используется для получения статуса платежа текущего пользователя"""
+    serializer_class = PaymentStatusSerializer
+
+    def get_queryset(self):
+        return Payments.objects.filter(paid_by_id=self.request.user.pk).only(
+            'course', 'amount', 'payment_date', 'status'
+        )
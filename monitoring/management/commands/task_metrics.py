@@ -0,0 +1,49 @@
+import time
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from monitoring.task_metrics import task_metrics
+
+
+class Command(BaseCommand):
+    help = 'Сводка по задачам Celery: количество запусков, ошибок и перезапусков, ' \
+           'средние задержка в очереди и время выполнения, количество задач в очереди брокера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5, help='период обновления сводки, в секундах')
+        parser.add_argument('--once', action='store_true', help='вывести сводку один раз')
+
+    def handle(self, *args, **options):
+        previous = None
+        while True:
+            metrics = task_metrics()
+            self.write_summary(metrics, previous, options['interval'])
+            if options['once']:
+                return
+            previous = metrics
+            time.sleep(options['interval'])
+
+    def write_summary(self, metrics, previous, interval):
+        self.stdout.write(f'\n{timezone.now():%Y-%m-%d %H:%M:%S}')
+        if metrics['queues'] is None:
+            self.stdout.write(self.style.WARNING('Брокер недоступен, длина очередей неизвестна'))
+        else:
+            self.stdout.write('Очереди: ' + ', '.join(f'{queue}={length}' for queue, length in metrics['queues'].items()))
+
+        self.stdout.write(
+            f'{"задача":<42}{"в очереди":>10}{"запущено":>10}{"в мин":>8}{"ошибки":>8}'
+            f'{"повторы":>9}{"задержка,мс":>13}{"время,мс":>10}'
+        )
+        for name, counters in metrics['tasks'].items():
+            per_minute = '-'
+            if previous:
+                started = counters['started'] - previous['tasks'].get(name, {}).get('started', 0)
+                per_minute = round(started * 60 / interval, 1)
+            latency = counters['latency_ms'] // counters['latency_count'] if counters['latency_count'] else '-'
+            runtime = counters['runtime_ms'] // counters['finished'] if counters['finished'] else '-'
+            queued = '-' if counters['queued'] is None else counters['queued']
+            self.stdout.write(
+                f'{name:<42}{queued:>10}{counters["started"]:>10}{per_minute:>8}{counters["failed"]:>8}'
+                f'{counters["retried"]:>9}{latency:>13}{runtime:>10}'
+            )
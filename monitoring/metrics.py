@@ -0,0 +1,90 @@
+import threading
+from collections import defaultdict
+
+# Границы интервалов гистограммы длительности запросов, в секундах
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class MetricsRegistry:
+    """Метрики, агрегированные в памяти процесса: счётчики и гистограммы
+    с метками. Выводятся в текстовом формате Prometheus. Каждый процесс
+    веб-сервера хранит собственные значения"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._descriptions = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def describe(self, name: str, metric_type: str, description: str) -> None:
+        self._descriptions[name] = (metric_type, description)
+
+    def inc(self, name: str, labels: dict, value: float = 1) -> None:
+        """Увеличение счётчика"""
+        with self._lock:
+            self._counters[name, _label_key(labels)] += value
+
+    def observe(self, name: str, labels: dict, value: float, buckets=DURATION_BUCKETS) -> None:
+        """Добавление значения в гистограмму"""
+        with self._lock:
+            histogram = self._histograms.setdefault(
+                (name, _label_key(labels)), {'buckets': dict.fromkeys(buckets, 0), 'sum': 0.0, 'count': 0}
+            )
+            for bound in histogram['buckets']:
+                if value <= bound:
+                    histogram['buckets'][bound] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            for name, (metric_type, description) in sorted(self._descriptions.items()):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, total in histogram['buckets'].items():
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {total}')
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram["count"]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram["sum"])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f'{value:.6f}'
+
+
+registry = MetricsRegistry()
+
+registry.describe('lms_http_requests_total', 'counter', 'Количество обработанных HTTP запросов')
+registry.describe('lms_http_request_duration_seconds', 'histogram', 'Длительность обработки HTTP запросов')
+registry.describe('lms_http_request_db_seconds_total', 'counter', 'Суммарное время выполнения запросов к БД')
+registry.describe('lms_http_request_queries_total', 'counter', 'Количество запросов к БД')
+registry.describe('lms_http_request_duplicate_queries_total', 'counter', 'Количество повторных одинаковых запросов к БД')
+registry.describe('lms_http_slow_requests_total', 'counter', 'Количество медленных HTTP запросов')
@@ -0,0 +1,97 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+from config import settings
+from monitoring.metrics import registry
+
+logger = logging.getLogger('monitoring.requests')
+
+
+class QueryRecorder:
+    """Обёртка выполнения запросов к БД (connection.execute_wrapper),
+    подсчитывающая количество запросов, их суммарное время и повторы
+    одинаковых запросов с одинаковыми параметрами"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self) -> int:
+        return sum(total - 1 for total in self.statements.values())
+
+
+class RequestMetricsMiddleware:
+    """Middleware собирает для каждого запроса (с учётом доли выборки
+    REQUEST_METRICS_SAMPLE_RATE) имя представления, общее время обработки,
+    время и количество запросов к БД, количество повторных запросов.
+    Метрики добавляются в заголовок Server-Timing, записываются в лог
+    одной строкой JSON и агрегируются для эндпоинта metrics/"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path in settings.REQUEST_METRICS_EXCLUDE_PATHS \
+                or random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match else 'unmatched'
+        slow = duration >= settings.REQUEST_SLOW_THRESHOLD
+        self.record(request, response, view, duration, recorder, slow)
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'app;dur={(duration - recorder.duration) * 1000:.1f}',
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries, '
+                f'{recorder.duplicates} duplicates"',
+                f'total;dur={duration * 1000:.1f}',
+            ))
+        return response
+
+    def record(self, request, response, view, duration, recorder, slow) -> None:
+        labels = {'view': view, 'method': request.method, 'status': response.status_code}
+        registry.inc('lms_http_requests_total', labels)
+        registry.observe('lms_http_request_duration_seconds', {'view': view, 'method': request.method}, duration)
+        registry.inc('lms_http_request_db_seconds_total', {'view': view}, recorder.duration)
+        registry.inc('lms_http_request_queries_total', {'view': view}, recorder.count)
+        registry.inc('lms_http_request_duplicate_queries_total', {'view': view}, recorder.duplicates)
+        if slow:
+            registry.inc('lms_http_slow_requests_total', {'view': view})
+
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'db_ms': round(recorder.duration * 1000, 1),
+            'queries': recorder.count,
+            'duplicate_queries': recorder.duplicates,
+            'slow': slow,
+        }, ensure_ascii=False))
@@ -0,0 +1,156 @@
+import json
+import time
+
+import redis
+from celery import current_app
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun, task_retry
+from django.core.cache import cache
+
+from config import settings
+
+# Счётчики задач хранятся в общем кэше, так как задачи выполняются
+# в процессах воркеров, а метрики читаются веб-сервером и командой task_metrics
+TASK_METRIC_CACHE_KEY = 'task_metrics:{}:{}'
+TASK_COUNTERS = (
+    'published', 'started', 'finished', 'succeeded', 'failed', 'retried',
+    'latency_ms', 'latency_count', 'runtime_ms',
+)
+
+# Заголовок сообщения с временем постановки задачи в очередь
+PUBLISHED_AT_HEADER = 'published_at'
+
+_started = {}
+
+
+def _incr(task_name: str, counter: str, delta: int = 1) -> None:
+    key = TASK_METRIC_CACHE_KEY.format(task_name, counter)
+    if not cache.add(key, delta, timeout=None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=None)
+
+
+@before_task_publish.connect
+def task_published(sender=None, headers=None, **kwargs):
+    """Отмечаем время постановки задачи в очередь в заголовке сообщения"""
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+    _incr(sender, 'published')
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    """Задержка между постановкой в очередь и началом выполнения задачи.
+    Вычисляется по часам веб-сервера и воркера, поэтому предполагает
+    их синхронизацию"""
+    _started[task_id] = time.monotonic()
+    _incr(task.name, 'started')
+    published_at = task.request.get(PUBLISHED_AT_HEADER) or (task.request.headers or {}).get(PUBLISHED_AT_HEADER)
+    if published_at:
+        _incr(task.name, 'latency_ms', max(int((time.time() - published_at) * 1000), 0))
+        _incr(task.name, 'latency_count')
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    """Время выполнения задачи и её результат"""
+    started = _started.pop(task_id, None)
+    if started is not None:
+        _incr(task.name, 'runtime_ms', int((time.monotonic() - started) * 1000))
+        _incr(task.name, 'finished')
+    if state == 'SUCCESS':
+        _incr(task.name, 'succeeded')
+
+
+@task_retry.connect
+def task_retried(sender=None, **kwargs):
+    _incr(sender.name, 'retried')
+
+
+@task_failure.connect
+def task_failed(sender=None, **kwargs):
+    _incr(sender.name, 'failed')
+
+
+def task_names() -> list:
+    """Имена задач проекта, зарегистрированных в приложении Celery"""
+    return sorted(name for name in current_app.tasks if not name.startswith('celery.'))
+
+
+def queue_depth(queues=None, inspect_limit: int = None):
+    """Функция возвращает количество сообщений в очередях брокера Redis
+    и их распределение по именам задач (по первым inspect_limit сообщениям
+    каждой очереди). При недоступности брокера возвращает None"""
+    queues = queues or settings.TASK_METRICS_QUEUES
+    inspect_limit = inspect_limit or settings.TASK_METRICS_QUEUE_INSPECT_LIMIT
+    try:
+        client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=1, socket_connect_timeout=1)
+        depth = {'queues': {}, 'tasks': {}}
+        for queue in queues:
+            depth['queues'][queue] = client.llen(queue)
+            for message in client.lrange(queue, 0, inspect_limit - 1):
+                task_name = json.loads(message).get('headers', {}).get('task', 'unknown')
+                depth['tasks'][task_name] = depth['tasks'].get(task_name, 0) + 1
+    except (redis.RedisError, ValueError):
+        return None
+    return depth
+
+
+def task_metrics(with_queues: bool = True) -> dict:
+    """Функция собирает счётчики задач из кэша и глубину очередей брокера"""
+    keys = {
+        TASK_METRIC_CACHE_KEY.format(name, counter): (name, counter)
+        for name in task_names() for counter in TASK_COUNTERS
+    }
+    values = cache.get_many(keys)
+    tasks = {name: dict.fromkeys(TASK_COUNTERS, 0) for name in task_names()}
+    for key, value in values.items():
+        name, counter = keys[key]
+        tasks[name][counter] = value
+
+    depth = queue_depth() if with_queues else None
+    for name, counters in tasks.items():
+        counters['queued'] = depth['tasks'].get(name, 0) if depth else None
+    return {'tasks': tasks, 'queues': depth['queues'] if depth else None}
+
+
+def render_task_metrics(metrics: dict = None) -> str:
+    """Метрики задач в текстовом формате Prometheus"""
+    metrics = metrics or task_metrics()
+    lines = []
+    for counter, description in (
+        ('published', 'Количество задач, поставленных в очередь'),
+        ('started', 'Количество запущенных задач'),
+        ('succeeded', 'Количество успешно выполненных задач'),
+        ('failed', 'Количество задач, завершившихся ошибкой'),
+        ('retried', 'Количество перезапусков задач'),
+    ):
+        lines.append(f'# HELP lms_celery_tasks_{counter}_total {description}')
+        lines.append(f'# TYPE lms_celery_tasks_{counter}_total counter')
+        lines.extend(
+            f'lms_celery_tasks_{counter}_total{{task="{name}"}} {counters[counter]}'
+            for name, counters in metrics['tasks'].items()
+        )
+
+    for counter, count, metric, description in (
+        ('latency_ms', 'latency_count', 'lms_celery_task_latency_seconds',
+         'Задержка от постановки в очередь до начала выполнения'),
+        ('runtime_ms', 'finished', 'lms_celery_task_runtime_seconds', 'Время выполнения задач'),
+    ):
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} summary')
+        for name, counters in metrics['tasks'].items():
+            lines.append(f'{metric}_sum{{task="{name}"}} {counters[counter] / 1000:.3f}')
+            lines.append(f'{metric}_count{{task="{name}"}} {counters[count]}')
+
+    if metrics['queues'] is not None:
+        lines.append('# HELP lms_celery_queue_length Количество сообщений в очереди брокера')
+        lines.append('# TYPE lms_celery_queue_length gauge')
+        lines.extend(f'lms_celery_queue_length{{queue="{queue}"}} {length}'
+                     for queue, length in metrics['queues'].items())
+        lines.append('# HELP lms_celery_task_queued Количество задач в очереди брокера')
+        lines.append('# TYPE lms_celery_task_queued gauge')
+        lines.extend(f'lms_celery_task_queued{{task="{name}"}} {counters["queued"]}'
+                     for name, counters in metrics['tasks'].items())
+    return '\n'.join(lines) + '\n'
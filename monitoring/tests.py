@@ -0,0 +1,145 @@
+import json
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from courses.models import Course
+from courses.tasks import process_payment, send_mail_about_update
+from monitoring.metrics import MetricsRegistry, registry
+from monitoring.middleware import QueryRecorder
+from monitoring.task_metrics import PUBLISHED_AT_HEADER, render_task_metrics, task_metrics, task_published
+from users.models import User
+
+
+class RequestMetricsTestCase(APITestCase):
+    """Класс для тестирования сбора метрик запросов"""
+
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        Course.objects.create(title='test', author=self.user)
+
+    def test_server_timing_and_log(self):
+        with self.assertLogs('monitoring.requests', 'INFO') as logs:
+            response = self.client.get(reverse('courses:courses-list'))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'courses:courses-list')
+        self.assertEqual(record['status'], status.HTTP_200_OK)
+        self.assertGreater(record['queries'], 0)
+        self.assertFalse(record['slow'])
+
+    def test_slow_request(self):
+        with mock.patch('monitoring.middleware.settings.REQUEST_SLOW_THRESHOLD', 0), \
+                self.assertLogs('monitoring.requests', 'WARNING'):
+            self.client.get(reverse('courses:courses-list'))
+        self.assertIn('lms_http_slow_requests_total{view="courses:courses-list"} 1', registry.render())
+
+    def test_sampling(self):
+        with mock.patch('monitoring.middleware.settings.REQUEST_METRICS_SAMPLE_RATE', 0):
+            response = self.client.get(reverse('courses:courses-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('courses:courses-list'))
+        with mock.patch('monitoring.views.settings.METRICS_TOKEN', 'secret'):
+            self.assertEqual(self.client.get(reverse('monitoring:metrics')).status_code,
+                             status.HTTP_403_FORBIDDEN)
+            response = self.client.get(reverse('monitoring:metrics'), HTTP_AUTHORIZATION='Bearer secret')
+
+        metrics = response.content.decode()
+        self.assertIn('lms_http_requests_total{method="GET",status="200",view="courses:courses-list"} 1', metrics)
+        self.assertIn('lms_http_request_duration_seconds_count{method="GET",view="courses:courses-list"} 1',
+                      metrics)
+
+    def test_duplicate_queries(self):
+        """Повторное выполнение одинакового запроса учитывается как дубликат"""
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            list(Course.objects.filter(pk=1))
+            list(Course.objects.filter(pk=1))
+            list(Course.objects.filter(pk=2))
+        self.assertEqual((recorder.count, recorder.duplicates), (3, 1))
+
+
+class MetricsRegistryTestCase(APITestCase):
+
+    def test_render(self):
+        metrics = MetricsRegistry()
+        metrics.describe('test_total', 'counter', 'Тест')
+        metrics.describe('test_seconds', 'histogram', 'Тест')
+        metrics.inc('test_total', {'view': 'a"b'}, 2)
+        metrics.observe('test_seconds', {}, 0.2, buckets=(0.1, 1))
+        self.assertEqual(metrics.render().splitlines(), [
+            '# HELP test_seconds Тест',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{le="0.1"} 0',
+            'test_seconds_bucket{le="1"} 1',
+            'test_seconds_bucket{le="+Inf"} 1',
+            'test_seconds_sum 0.200000',
+            'test_seconds_count 1',
+            '# HELP test_total Тест',
+            '# TYPE test_total counter',
+            'test_total{view="a\\"b"} 2',
+        ])
+
+
+class TaskMetricsTestCase(APITestCase):
+    """Класс для тестирования метрик задач Celery"""
+
+    def setUp(self):
+        cache.clear()
+        self.task_name = send_mail_about_update.name
+
+    def counters(self, name):
+        return task_metrics(with_queues=False)['tasks'][name]
+
+    def test_task_run(self):
+        headers = {}
+        task_published(sender=self.task_name, headers=headers)
+        self.assertIn(PUBLISHED_AT_HEADER, headers)
+
+        send_mail_about_update.apply(args=(['a@test.com'], 'test'),
+                                     headers={PUBLISHED_AT_HEADER: time.time() - 2})
+        counters = self.counters(self.task_name)
+        self.assertEqual(
+            {key: counters[key] for key in ('published', 'started', 'finished', 'succeeded', 'failed')},
+            {'published': 1, 'started': 1, 'finished': 1, 'succeeded': 1, 'failed': 0}
+        )
+        self.assertEqual(counters['latency_count'], 1)
+        self.assertGreaterEqual(counters['latency_ms'], 2000)
+
+    def test_task_failure(self):
+        process_payment.apply(args=(0,))
+        counters = self.counters(process_payment.name)
+        self.assertEqual((counters['failed'], counters['succeeded']), (1, 0))
+
+    def test_queue_depth(self):
+        message = json.dumps({'headers': {'task': self.task_name}, 'body': ''})
+        broker = mock.Mock(llen=mock.Mock(return_value=3), lrange=mock.Mock(return_value=[message] * 3))
+        with mock.patch('monitoring.task_metrics.redis.Redis.from_url', return_value=broker):
+            metrics = task_metrics()
+        self.assertEqual(metrics['queues'], {'celery': 3})
+        self.assertEqual(metrics['tasks'][self.task_name]['queued'], 3)
+
+        rendered = render_task_metrics(metrics)
+        self.assertIn('lms_celery_queue_length{queue="celery"} 3', rendered)
+        self.assertIn(f'lms_celery_task_queued{{task="{self.task_name}"}} 3', rendered)
+
+    def test_summary_command(self):
+        send_mail_about_update.apply(args=(['a@test.com'], 'test'))
+        out = StringIO()
+        with mock.patch('monitoring.task_metrics.queue_depth', return_value=None):
+            call_command('task_metrics', '--once', stdout=out)
+        self.assertIn('Брокер недоступен', out.getvalue())
+        self.assertIn(self.task_name, out.getvalue())
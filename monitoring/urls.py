@@ -0,0 +1,10 @@
+from django.urls import path
+
+from monitoring.apps import MonitoringConfig
+from monitoring.views import metrics_view
+
+app_name = MonitoringConfig.name
+
+urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
+]
@@ -0,0 +1,23 @@
+import hmac
+
+from django.http import HttpResponse, HttpResponseForbidden
+
+from config import settings
+from monitoring.metrics import registry
+from monitoring.task_metrics import render_task_metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """Метрики запросов процесса и метрики задач Celery в текстовом
+    формате Prometheus. Если задан
+    METRICS_TOKEN, требуется заголовок Authorization: Bearer <token>,
+    без токена эндпоинт доступен только в режиме DEBUG"""
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render() + render_task_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
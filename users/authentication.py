@@ -0,0 +1,38 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from users.services import is_token_revoked
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, построенный по данным токена доступа без обращения к БД.
+    Роли (названия групп) и признак активности берутся из токена"""
+
+    @cached_property
+    def email(self) -> str:
+        return self.token.get('email', '')
+
+    @cached_property
+    def is_active(self) -> bool:
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def roles(self) -> frozenset:
+        return frozenset(self.token.get('roles', ()))
+
+    def __str__(self):
+        return self.email or super().__str__()
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """Аутентификация по токену доступа без загрузки пользователя из БД.
+    Токены заблокированных пользователей и пользователей, сменивших роли,
+    отклоняются по списку отзыва в кэше"""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not user.is_active or is_token_revoked(user.pk, validated_token.get('claims_at', validated_token.get('iat', 0))):
+            raise AuthenticationFailed('Токен отозван, получите новый токен', code='token_revoked')
+        return user
@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+
+from users.services import deactivate_inactive_users
+
+
+class Command(BaseCommand):
+    help = 'Блокировка пользователей, давно не заходивших в систему'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='только подсчитать пользователей, не блокируя их')
+        parser.add_argument('--chunk-size', type=int,
+                            help='количество пользователей, блокируемых одним запросом')
+
+    def handle(self, *args, **options):
+        metrics = deactivate_inactive_users(
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size']
+        )
+        self.stdout.write(
+            f'Найдено: {metrics["scanned"]}, заблокировано: {metrics["deactivated"]}, '
+            f'время: {metrics["duration"]} с'
+        )
@@ -15,3 +15,9 @@ class User(AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Поиск неактивных пользователей (users.services.deactivate_inactive_users)
+            models.Index(fields=['last_login'], condition=models.Q(is_active=True), name='user_active_last_login_idx'),
+        ]
@@ -1,6 +1,8 @@
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 
+from users.services import MODERATOR_ROLE, get_user_roles
+
 
 class IsModeratorOrOwner(BasePermission):
     """
@@ -11,28 +13,39 @@ class IsModeratorOrOwner(BasePermission):
     авторами которых он является
     """
 
-    MODERATOR_ROLE = 'Moderator'
+    MODERATOR_ROLE = MODERATOR_ROLE
 
     def has_permission(self, request, view):
-        if request.user.groups.filter(name=self.MODERATOR_ROLE).exists():
-            permitted_methods = permissions.SAFE_METHODS + ('PUT', 'PATCH')
-            return request.method in permitted_methods
-        return True
+        return self.has_method_permission(request, request.method)
 
     def has_object_permission(self, request, view, obj):
-        if not request.user.groups.filter(name=self.MODERATOR_ROLE).exists() \
-                and request.method in ['GET', 'PUT', 'PATCH', 'DELETE']:
-            return request.user == obj.author
-        return True
+        return self.has_method_object_permission(request, request.method, obj)
 
+    def has_method_permission(self, request, method):
+        """Проверка права на выполнение действия, соответствующего HTTP методу"""
+        if self.MODERATOR_ROLE in get_user_roles(request):
+            permitted_methods = permissions.SAFE_METHODS + ('PUT', 'PATCH')
+            return method in permitted_methods
+        return True
 
-class IsCurrentUser(BasePermission):
-    def has_object_permission(self, request, view, obj):
-        if request.method not in permissions.SAFE_METHODS:
-            return request.user == obj
+    def has_method_object_permission(self, request, method, obj):
+        """Проверка права на выполнение действия, соответствующего HTTP методу,
+        над заданным объектом"""
+        if self.MODERATOR_ROLE not in get_user_roles(request) \
+                and method in ['GET', 'PUT', 'PATCH', 'DELETE']:
+            return request.user.pk == obj.author_id
         return True
 
 
+class IsModerator(BasePermission):
+    """Класс разрешений предоставляет доступ только пользователям из группы Модераторов"""
 
+    def has_permission(self, request, view):
+        return MODERATOR_ROLE in get_user_roles(request)
 
 
+class IsCurrentUser(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        if request.method not in permissions.SAFE_METHODS:
+            return request.user.pk == obj.pk
+        return True
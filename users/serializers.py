@@ -1,11 +1,21 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
-from courses.serializers import PaymentsForUserSerializer
+from config.fieldsets import SparseFieldsetSerializerMixin
+from courses.services import get_payments_summary
 from users.models import User
+from users.services import token_claims
 
 
-class UserSerializer(serializers.ModelSerializer):
-    payments_story = PaymentsForUserSerializer(source='payments_set', many=True, read_only=True)
+class UserSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Профиль пользователя содержит сводку по его платежам, сами платежи
+    выдаются постранично (/users/<pk>/payments/)"""
+    payments_summary = serializers.SerializerMethodField()
+
+    def get_payments_summary(self, obj):
+        return get_payments_summary(obj.pk)
 
     class Meta:
         model = User
@@ -19,7 +29,36 @@ class UserManageSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserAlienSerializer(serializers.ModelSerializer):
+class UserAlienSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'first_name', 'email', 'avatar', 'city')
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Добавляем в токены данные пользователя, необходимые для stateless аутентификации"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """При обновлении токена доступа данные пользователя загружаются
+    из БД заново: токен получает актуальные роли, заблокированный
+    пользователь новый токен не получает"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('Пользователь не найден или заблокирован', code='user_inactive')
+
+        access = refresh.access_token
+        access.set_iat()
+        for claim, value in token_claims(user).items():
+            access[claim] = value
+        return {'access': str(access)}
@@ -0,0 +1,114 @@
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from config import settings
+from users.models import User
+
+MODERATOR_ROLE = 'Moderator'
+
+USER_ROLES_CACHE_KEY = 'user_roles:{}'
+
+# Время отзыва токенов пользователя (заблокированного или сменившего роли)
+REVOKED_TOKENS_CACHE_KEY = 'revoked_tokens:{}'
+
+
+def get_user_roles(request) -> frozenset:
+    """Функция возвращает набор ролей (названий групп) текущего пользователя.
+    Роли вычисляются один раз за запрос и сохраняются в объекте запроса,
+    между запросами они хранятся в общем кэше"""
+    roles = getattr(request, '_user_roles', None)
+    if roles is None:
+        roles = load_user_roles(request.user)
+        request._user_roles = roles
+    return roles
+
+
+def load_user_roles(user) -> frozenset:
+    """Функция получает роли пользователя из токена доступа (при stateless
+    аутентификации), из кэша, при отсутствии записи в кэше - из БД"""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, 'roles', None)
+    if roles is not None:
+        return roles
+
+    key = USER_ROLES_CACHE_KEY.format(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, roles, settings.USER_ROLES_CACHE_TIMEOUT)
+    return roles
+
+
+def is_moderator(request) -> bool:
+    """Функция проверяет, входит ли текущий пользователь в группу Модераторов"""
+    return MODERATOR_ROLE in get_user_roles(request)
+
+
+def invalidate_user_roles(user_pks) -> None:
+    """Функция удаляет из кэша роли заданных пользователей"""
+    cache.delete_many([USER_ROLES_CACHE_KEY.format(pk) for pk in user_pks])
+
+
+def revoke_user_tokens(user_pks) -> None:
+    """Функция отзывает выданные до текущего момента токены доступа
+    пользователей. Отметка хранится в кэше в течение срока действия
+    токена доступа: позже все отозванные токены истекают сами"""
+    revoked_at = time.time()
+    cache.set_many(
+        {REVOKED_TOKENS_CACHE_KEY.format(pk): revoked_at for pk in user_pks},
+        settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    )
+
+
+def is_token_revoked(user_pk, issued_at) -> bool:
+    """Функция проверяет, отозван ли токен доступа пользователя,
+    данные которого получены в момент issued_at (timestamp)"""
+    revoked_at = cache.get(REVOKED_TOKENS_CACHE_KEY.format(user_pk))
+    return revoked_at is not None and issued_at <= revoked_at
+
+
+def token_claims(user) -> dict:
+    """Данные пользователя, добавляемые в токены для stateless аутентификации.
+    Время их получения хранится с дробной частью, в отличие от iat: токен,
+    выданный в ту же секунду после отзыва, остаётся действительным"""
+    return {
+        'claims_at': time.time(),
+        'email': user.email,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'roles': sorted(load_user_roles(user)),
+    }
+
+
+def deactivate_inactive_users(dry_run: bool = False, chunk_size: int = None) -> dict:
+    """Функция блокирует пользователей, не заходивших в систему дольше
+    USER_INACTIVITY_PERIOD. Пользователи выбираются пачками по первичному
+    ключу (keyset-пагинация), каждая пачка блокируется одним UPDATE запросом.
+    В режиме dry_run изменения в БД не вносятся.
+    Возвращает метрики выполнения: количество найденных и заблокированных
+    пользователей и длительность работы в секундах"""
+    started = time.monotonic()
+    chunk_size = chunk_size or settings.USER_DEACTIVATION_CHUNK_SIZE
+    cutoff = timezone.now() - settings.USER_INACTIVITY_PERIOD
+    inactive_users = User.objects.filter(is_active=True, last_login__lt=cutoff)
+
+    metrics = {'scanned': 0, 'deactivated': 0, 'dry_run': dry_run}
+    last_pk = 0
+    while True:
+        pks = list(
+            inactive_users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not pks:
+            break
+        metrics['scanned'] += len(pks)
+        if not dry_run:
+            metrics['deactivated'] += inactive_users.filter(pk__in=pks).update(is_active=False)
+            # Блокировка действует и для уже выданных токенов доступа
+            revoke_user_tokens(pks)
+        last_pk = pks[-1]
+
+    metrics['duration'] = round(time.monotonic() - started, 3)
+    return metrics
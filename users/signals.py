@@ -0,0 +1,58 @@
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import User
+from users.services import invalidate_user_roles, revoke_user_tokens
+
+
+def roles_changed(user_pks) -> None:
+    """Сбрасываем кэш ролей пользователей и отзываем их токены доступа,
+    содержащие прежние роли: клиент получит новые токены через refresh.
+    Кэш сбрасывается после фиксации транзакции, иначе параллельный запрос
+    успеет снова закэшировать прежние роли"""
+    user_pks = list(user_pks)
+
+    def invalidate():
+        invalidate_user_roles(user_pks)
+        revoke_user_tokens(user_pks)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """При изменении состава групп сбрасываем роли затронутых пользователей"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            roles_changed([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        roles_changed(pk_set)
+    elif action == 'pre_clear':
+        # После очистки состав группы уже не получить, поэтому сбрасываем роли заранее
+        roles_changed(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """При переименовании или удалении группы сбрасываем роли её участников"""
+    if instance.pk:
+        roles_changed(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw, **kwargs):
+    """Токены доступа заблокированного пользователя отзываются
+    после фиксации транзакции"""
+    if not created and not raw and not instance.is_active:
+        transaction.on_commit(lambda: revoke_user_tokens([instance.pk]))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Токены доступа удалённого пользователя отзываются
+    после фиксации транзакции"""
+    user_pk = instance.pk
+    transaction.on_commit(lambda: revoke_user_tokens([user_pk]))
@@ -1,18 +1,15 @@
-from datetime import datetime, timezone
-
 from celery import shared_task
 
-from users.models import User
+from users.services import deactivate_inactive_users
 
 
 @shared_task
-def check_active_user():
+def check_active_user(dry_run=False):
     """Периодическая задача на проверку активности пользователей.
     Если пользователь не заходил в систему более 30 дней, его статус
     is_active устанавливается в False и блокируется доступ в систему"""
-    for user in User.objects.filter(last_login__isnull=False):
-        last_login_delta = datetime.now(timezone.utc) - user.last_login
-        if last_login_delta.days > 30:
-            user.is_active = False
-            user.save()
-            print(f'Пользователь {user} заблокирован')
+    metrics = deactivate_inactive_users(dry_run=dry_run)
+    print(f'Проверка активности пользователей: найдено {metrics["scanned"]}, '
+          f'заблокировано {metrics["deactivated"]}, время {metrics["duration"]} с'
+          f'{" (пробный запуск)" if dry_run else ""}')
+    return metrics
@@ -0,0 +1,245 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Course, Lesson, Payments
+from users.models import User
+from users.services import get_user_roles, is_moderator, deactivate_inactive_users, USER_ROLES_CACHE_KEY
+
+
+class UserRolesTestCase(APITestCase):
+    """Класс для тестирования кэширования ролей пользователей"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.moderators = Group.objects.create(name='Moderator')
+        self.client.force_authenticate(user=self.user)
+
+    def make_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return request
+
+    def test_roles_resolved_once_per_request(self):
+        """Роли вычисляются одним запросом к БД и затем берутся из кэша"""
+        request = self.make_request()
+        with self.assertNumQueries(1):
+            self.assertFalse(is_moderator(request))
+            self.assertEqual(get_user_roles(request), frozenset())
+
+        with self.assertNumQueries(0):
+            self.assertFalse(is_moderator(self.make_request()))
+
+    def test_roles_invalidated_on_group_change(self):
+        """Изменение состава группы сбрасывает кэш ролей"""
+        self.assertFalse(is_moderator(self.make_request()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.moderators)
+        self.assertTrue(is_moderator(self.make_request()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moderators.user_set.remove(self.user)
+        self.assertFalse(is_moderator(self.make_request()))
+
+    def test_roles_invalidated_after_commit(self):
+        """Роли, закэшированные параллельным запросом до фиксации
+        транзакции, сбрасываются после её фиксации"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.moderators)
+            cache.set(USER_ROLES_CACHE_KEY.format(self.user.pk), frozenset())
+        self.assertTrue(is_moderator(self.make_request()))
+
+    def test_moderator_lessons_list(self):
+        """Модератор видит уроки всех пользователей"""
+        other = User.objects.create(email='other@test.com', password='test')
+        Lesson.objects.create(title='test', author=other)
+
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.json()['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.moderators)
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 1)
+
+
+class DeactivateInactiveUsersTestCase(APITestCase):
+    """Класс для тестирования блокировки неактивных пользователей"""
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            User.objects.create(email=f'old{i}@test.com', last_login=now - timedelta(days=40))
+        User.objects.create(email='recent@test.com', last_login=now - timedelta(days=1))
+        User.objects.create(email='never@test.com')
+
+    def test_dry_run(self):
+        """В пробном режиме пользователи только подсчитываются"""
+        metrics = deactivate_inactive_users(dry_run=True, chunk_size=2)
+
+        self.assertEqual(metrics['scanned'], 5)
+        self.assertEqual(metrics['deactivated'], 0)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 0)
+
+    def test_deactivate(self):
+        """Блокируются только пользователи, не заходившие более 30 дней,
+        каждая пачка - одним запросом"""
+        with self.assertNumQueries(7):
+            metrics = deactivate_inactive_users(chunk_size=2)
+
+        self.assertEqual(metrics['deactivated'], 5)
+        self.assertEqual(
+            set(User.objects.filter(is_active=True).values_list('email', flat=True)),
+            {'recent@test.com', 'never@test.com'}
+        )
+
+
+class StatelessJWTAuthenticationTestCase(APITestCase):
+    """Класс для тестирования аутентификации по токену без обращения к БД"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User(email='user@test.com')
+        self.user.set_password('test')
+        self.user.save()
+        self.moderators = Group.objects.create(name='Moderator')
+        self.user.groups.add(self.moderators)
+
+    def obtain_tokens(self):
+        response = self.client.post('/token/', {'email': 'user@test.com', 'password': 'test'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def authenticate(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_token_claims(self):
+        """Токен доступа содержит данные пользователя и его роли"""
+        token = AccessToken(self.obtain_tokens()['access'])
+
+        self.assertEqual(token['email'], 'user@test.com')
+        self.assertTrue(token['is_active'])
+        self.assertEqual(token['roles'], ['Moderator'])
+
+    def test_request_without_user_query(self):
+        """Пользователь и его роли берутся из токена, без запросов к таблицам
+        пользователей и групп"""
+        self.authenticate(self.obtain_tokens()['access'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query['sql'] for query in queries
+                          if 'users_user' in query['sql'] or 'auth_group' in query['sql']])
+
+    def test_deactivated_user_token_revoked(self):
+        """Токены заблокированного пользователя отклоняются, обновить их нельзя"""
+        tokens = self.obtain_tokens()
+        self.authenticate(tokens['access'])
+        self.assertEqual(self.client.get(reverse('courses:lessons_list')).status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        response = self.client.post('/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_token_revoked(self):
+        """Токены удалённого пользователя отклоняются"""
+        self.authenticate(self.obtain_tokens()['access'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_roles_change_requires_refresh(self):
+        """После смены ролей прежний токен доступа отклоняется,
+        новый токен содержит актуальные роли"""
+        tokens = self.obtain_tokens()
+        self.authenticate(tokens['access'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moderators.user_set.remove(self.user)
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        response = self.client.post('/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = response.json()['access']
+        self.assertEqual(AccessToken(access)['roles'], [])
+
+        self.authenticate(access)
+        response = self.client.get(reverse('courses:lessons_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class UserPaymentsTestCase(APITestCase):
+    """Класс для тестирования истории платежей и сводки в профиле пользователя"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(email='user@test.com', password='test')
+        self.client.force_authenticate(user=self.user)
+        course = Course.objects.create(title='course', author=self.user)
+        lesson = Lesson.objects.create(title='lesson', course=course, author=self.user)
+        for i in range(6):
+            Payments.objects.create(paid_by=self.user, course=course if i % 2 else None,
+                                    lesson=None if i % 2 else lesson, amount=100, payment_way='cash')
+        Payments.objects.create(paid_by=self.user, course=course, amount=500, payment_way='cash',
+                                status=Payments.STATUS_FAILED)
+
+    def test_profile_summary(self):
+        """Профиль содержит только сводку по платежам"""
+        response = self.client.get(reverse('users:user-detail', args=[self.user.pk]))
+        self.assertNotIn('payments_story', response.json())
+        summary = response.json()['payments_summary']
+        self.assertEqual(summary['count'], 7)
+        self.assertEqual(summary['succeeded_count'], 6)
+        self.assertEqual(summary['succeeded_amount'], 600)
+
+    def test_payments_paginated(self):
+        """История платежей выдаётся постранично, названия курсов и уроков
+        загружаются тем же запросом"""
+        # Последний платёж проведён задним числом и должен оказаться в конце
+        last = Payments.objects.latest('pk')
+        Payments.objects.filter(pk=last.pk).update(payment_date=last.payment_date - timedelta(days=1))
+        url = reverse('users:user-payments', args=[self.user.pk])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 7)
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertEqual({payment['paid_for'] for payment in response.json()['results']}, {'course', 'lesson'})
+        # При равной дате платежа новые платежи идут первыми
+        expected = list(Payments.objects.order_by('-payment_date', '-pk').values_list('pk', flat=True))
+        self.assertEqual(expected[-1], last.pk)
+        self.assertEqual([payment['id'] for payment in response.json()['results']], expected[:5])
+
+        response = self.client.get(url, {'pagination': 'cursor'})
+        self.assertEqual([payment['id'] for payment in response.json()['results']], expected[:5])
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([payment['id'] for payment in response.json()['results']], expected[5:])
+
+    def test_other_user_payments_forbidden(self):
+        other = User.objects.create(email='other@test.com', password='test')
+        response = self.client.get(reverse('users:user-payments', args=[other.pk]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
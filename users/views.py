@@ -1,12 +1,17 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from config.fieldsets import SparseFieldsetViewMixin
+from courses.models import Payments
+from courses.paginators import PaymentsPaginator
+from courses.serializers import PaymentsForUserSerializer
 from users.models import User
 from users.permissions import IsCurrentUser
 from users.serializers import UserSerializer, UserAlienSerializer, UserManageSerializer
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()
     permission_classes = [IsCurrentUser]
@@ -14,7 +19,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def get_serializer_class(self):
         """В зависимости от типа запроса используем различные сериализаторы"""
-        if self.action not in ('list', 'create') and self.request.user == self.get_object():
+        if self.action not in ('list', 'create') and str(self.request.user.pk) == self.kwargs.get(self.lookup_field):
             return UserSerializer
         else:
             return UserAlienSerializer
@@ -28,3 +33,16 @@ class UserViewSet(viewsets.ModelViewSet):
         user.set_password(password)
         user.save()
         return Response('Successful created user', status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], pagination_class=PaymentsPaginator)
+    def payments(self, request, *args, **kwargs):
+        """История платежей текущего пользователя постранично. Названия
+        оплаченных курсов и уроков загружаются тем же запросом"""
+        if str(request.user.pk) != kwargs.get(self.lookup_field):
+            self.permission_denied(request, message='Просматривать можно только свои платежи')
+        queryset = Payments.objects.filter(paid_by_id=request.user.pk).select_related('course', 'lesson').only(
+            'payment_date', 'amount', 'payment_way', 'status', 'course__title', 'lesson__title'
+        ).order_by('-payment_date', '-pk')
+        page = self.paginate_queryset(queryset)
+        serializer = PaymentsForUserSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)